@@ -20,6 +20,35 @@ class Config:
     # OpenAI Configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+    # 'text' (rótulo + confiança escrita) ou 'logprobs' (um token, confiança via probabilidades)
+    OPENAI_CLASSIFY_MODE = os.environ.get('OPENAI_CLASSIFY_MODE', 'text')
+    
+    # Model Routing Configuration (lidas pelo ModelRouter)
+    # OPENAI_MODELS: lista de modelos separados por vírgula, em ordem de preferência
+    # OPENAI_MODEL_ROUTES: lista JSON com name/model/base_url/api_key/max_chars
+    OPENAI_MODELS = os.environ.get('OPENAI_MODELS', '')
+    OPENAI_MODEL_ROUTES = os.environ.get('OPENAI_MODEL_ROUTES')
+    ROUTER_SHORT_EMAIL_CHARS = int(os.environ.get('ROUTER_SHORT_EMAIL_CHARS', 500))
+    ROUTER_HEDGING = os.environ.get('ROUTER_HEDGING', 'True').lower() == 'true'
+    # Threads do roteador por worker; padrão: 2 x GUNICORN_THREADS (chamada + hedge)
+    ROUTER_MAX_WORKERS = int(os.environ.get('ROUTER_MAX_WORKERS',
+                                            2 * int(os.environ.get('GUNICORN_THREADS', 8))))
+    # Limites de cada chamada a um endpoint (o roteador já faz failover)
+    ROUTER_REQUEST_TIMEOUT = float(os.environ.get('ROUTER_REQUEST_TIMEOUT', 30.0))
+    ROUTER_MAX_RETRIES = int(os.environ.get('ROUTER_MAX_RETRIES', 0))
+    
+    # Gunicorn Configuration (lidas por gunicorn.conf.py)
+    # A requisição passa quase todo o tempo esperando a OpenAI: com 'gthread'
+    # cada worker atende GUNICORN_THREADS requisições ao mesmo tempo
+    # compartilhando os processadores; 'gevent' usa GUNICORN_WORKER_CONNECTIONS
+    # greenlets por worker (requer o pacote gevent); 'sync' atende uma por vez
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 2))
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+    GUNICORN_WORKER_CONNECTIONS = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+    GUNICORN_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+    # Cria os processadores ao iniciar o worker (wsgi.py), e não na primeira requisição
+    PRELOAD_PROCESSORS = os.environ.get('PRELOAD_PROCESSORS', 'True').lower() == 'true'
     
     # CORS Configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://localhost:5000').split(',')
@@ -27,7 +56,46 @@ class Config:
     # File Upload Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-    ALLOWED_EXTENSIONS = {'txt', 'pdf'}
+    ALLOWED_EXTENSIONS = {'txt', 'pdf', 'zip'}
+    
+    # Batch Upload Configuration (vários arquivos ou ZIP)
+    UPLOAD_MAX_WORKERS = int(os.environ.get('UPLOAD_MAX_WORKERS', 4))
+    ARCHIVE_MAX_MEMBERS = int(os.environ.get('ARCHIVE_MAX_MEMBERS', 1000))
+    # Limites contra zip bombs: tamanho descompactado total e taxa de compressão
+    ARCHIVE_MAX_TOTAL_SIZE = int(os.environ.get('ARCHIVE_MAX_TOTAL_SIZE', 256 * 1024 * 1024))
+    ARCHIVE_MAX_RATIO = int(os.environ.get('ARCHIVE_MAX_RATIO', 100))
+    
+    # NDJSON Streaming Configuration (/api/classify/stream)
+    NDJSON_MAX_WORKERS = int(os.environ.get('NDJSON_MAX_WORKERS', 8))
+    # Máximo de emails em andamento por conexão (controla a memória)
+    NDJSON_WINDOW = int(os.environ.get('NDJSON_WINDOW', 32))
+    NDJSON_MAX_LINE_BYTES = int(os.environ.get('NDJSON_MAX_LINE_BYTES', 1024 * 1024))
+    
+    # History Configuration (SQLite com escrita em lote em background)
+    HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', 'True').lower() == 'true'
+    HISTORY_DB_PATH = os.environ.get(
+        'HISTORY_DB_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'history.db')
+    )
+    HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 500))
+    HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 0.5))
+    HISTORY_MAX_PAGE_SIZE = int(os.environ.get('HISTORY_MAX_PAGE_SIZE', 500))
+    # Espera máxima (s) pela gravação da fila ao encerrar o worker
+    HISTORY_CLOSE_TIMEOUT = float(os.environ.get('HISTORY_CLOSE_TIMEOUT', 10.0))
+    
+    # Lazy Response Configuration
+    # Com LAZY_RESPONSES, /api/classify devolve um response_id e a resposta
+    # só é gerada quando buscada em /api/responses/<id>. Handles e respostas
+    # ficam em SQLite para que qualquer worker do gunicorn atenda a busca
+    LAZY_RESPONSES = os.environ.get('LAZY_RESPONSES', 'False').lower() == 'true'
+    RESPONSE_PREFETCH = os.environ.get('RESPONSE_PREFETCH', 'False').lower() == 'true'
+    RESPONSE_DB_PATH = os.environ.get(
+        'RESPONSE_DB_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'responses.db')
+    )
+    RESPONSE_TTL_SECONDS = int(os.environ.get('RESPONSE_TTL_SECONDS', 3600))
+    RESPONSE_STORE_MAX_ENTRIES = int(os.environ.get('RESPONSE_STORE_MAX_ENTRIES', 10000))
+    RESPONSE_PREFETCH_WORKERS = int(os.environ.get('RESPONSE_PREFETCH_WORKERS', 2))
     
     @staticmethod
     def init_app(app):
@@ -50,6 +118,7 @@ class TestingConfig(Config):
     """Configuração para testes"""
     TESTING = True
     DEBUG = True
+    HISTORY_ENABLED = False
 
 
 config = {
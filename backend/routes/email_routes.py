@@ -1,10 +1,16 @@
 """
 Rotas da API para classificação de emails
 """
+import atexit
+import io
+import json
 import os
 import sys
-from flask import Blueprint, request, jsonify
+import threading
+from datetime import datetime
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import get_input_stream
 
 # Garantir que o path está configurado
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,8 +20,12 @@ if parent_dir not in sys.path:
 
 from src.processors.text_processor import TextProcessor
 from src.processors.pdf_processor import PDFProcessor
+from src.processors.archive_processor import ArchiveLimitError, ArchiveProcessor
 from src.classifiers.email_classifier import EmailClassifier
 from src.generators.response_generator import ResponseGenerator
+from src.generators.response_store import ResponseStore
+from src.storage.history_store import HistoryStore
+from src.utils.concurrency import bounded_map
 
 email_bp = Blueprint('email', __name__)
 
@@ -24,28 +34,238 @@ text_processor = None
 pdf_processor = None
 email_classifier = None
 response_generator = None
+response_store = None
+history_store = None
+
+# Protege a inicialização lazy com workers multi-thread (gthread/gevent):
+# a primeira leitura é sem lock e só quem encontra None disputa o lock
+_init_lock = threading.RLock()
 
 
 def get_processors():
-    """Inicializa e retorna os processadores (lazy loading)"""
+    """Inicializa e retorna os processadores (lazy loading, thread-safe)"""
     global text_processor, pdf_processor, email_classifier, response_generator
     
-    if text_processor is None:
-        text_processor = TextProcessor()
-    if pdf_processor is None:
-        pdf_processor = PDFProcessor()
-    if email_classifier is None:
-        email_classifier = EmailClassifier()
-    if response_generator is None:
-        response_generator = ResponseGenerator()
+    if None in (text_processor, pdf_processor, email_classifier, response_generator):
+        with _init_lock:
+            if text_processor is None:
+                text_processor = TextProcessor()
+            if pdf_processor is None:
+                pdf_processor = PDFProcessor()
+            if email_classifier is None:
+                email_classifier = EmailClassifier()
+            if response_generator is None:
+                response_generator = ResponseGenerator()
     
     return text_processor, pdf_processor, email_classifier, response_generator
 
 
-def allowed_file(filename):
+def get_response_store():
+    """Inicializa e retorna o armazenamento de respostas sob demanda (lazy loading, thread-safe)"""
+    global response_store
+    
+    if response_store is None:
+        with _init_lock:
+            if response_store is None:
+                _, _, _, response_gen = get_processors()
+                history = get_history_store()
+                response_store = ResponseStore(
+                    response_gen,
+                    current_app.config['RESPONSE_DB_PATH'],
+                    ttl_seconds=current_app.config['RESPONSE_TTL_SECONDS'],
+                    max_entries=current_app.config['RESPONSE_STORE_MAX_ENTRIES'],
+                    prefetch_workers=current_app.config['RESPONSE_PREFETCH_WORKERS'],
+                    on_generated=history.update_response if history else None
+                )
+    
+    return response_store
+
+
+def get_history_store():
+    """Inicializa e retorna o histórico de classificações, se habilitado (lazy loading, thread-safe)"""
+    global history_store
+    
+    if history_store is None and current_app.config['HISTORY_ENABLED']:
+        with _init_lock:
+            if history_store is None:
+                history_store = HistoryStore(
+                    current_app.config['HISTORY_DB_PATH'],
+                    batch_size=current_app.config['HISTORY_BATCH_SIZE'],
+                    flush_interval=current_app.config['HISTORY_FLUSH_INTERVAL']
+                )
+                # Sem isso, a fila de escrita se perde ao reiniciar o worker
+                atexit.register(history_store.close, current_app.config['HISTORY_CLOSE_TIMEOUT'])
+    
+    return history_store
+
+
+def _request_flag(name, default=False, query_only=False):
+    """
+    Lê uma opção booleana do corpo JSON, do formulário ou da query string
+
+    Com `query_only`, apenas a query string é lida: acessar o corpo faria o
+    Werkzeug aplicar MAX_CONTENT_LENGTH (rotas de streaming).
+    """
+    value = None
+    if query_only:
+        value = request.args.get(name)
+    else:
+        if request.is_json and isinstance(request.json, dict):
+            value = request.json.get(name)
+        if value is None:
+            value = request.values.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in {'1', 'true', 'yes', 'on'}
+
+
+def result_options(source, query_only=False):
+    """
+    Resolve, no contexto da requisição, as opções usadas por `build_result`
+    
+    No modo lazy (`lazy=true` na requisição ou LAZY_RESPONSES na configuração)
+    inclui o armazenamento de respostas; com HISTORY_ENABLED, o histórico.
+    
+    Args:
+        source: Origem gravada no histórico (ex: nome da rota)
+        query_only: Lê `lazy`/`prefetch` apenas da query string (corpo em streaming)
+        
+    Returns:
+        dict: {'store', 'prefetch', 'history', 'source'}
+    """
+    options = {'store': None, 'prefetch': False, 'history': get_history_store(), 'source': source}
+    if _request_flag('lazy', current_app.config['LAZY_RESPONSES'], query_only):
+        options['store'] = get_response_store()
+        options['prefetch'] = _request_flag('prefetch', current_app.config['RESPONSE_PREFETCH'], query_only)
+    return options
+
+
+def build_result(email_text, classification_result, response_gen, options=None):
+    """
+    Monta o resultado da classificação com a resposta sugerida
+    
+    Com um `store` nas opções (modo lazy) a resposta não é gerada aqui: o
+    resultado leva um `response_id` que pode ser buscado depois em
+    /api/responses/<id>. Com `history`, o resultado é enfileirado no histórico.
+    Não depende do contexto da requisição, podendo rodar em outras threads.
+    """
+    result = {
+        'category': classification_result['category'],
+        'confidence': classification_result['confidence']
+    }
+    result.update(response_fields(email_text, classification_result, response_gen, options))
+    return result
+
+
+def response_fields(email_text, classification_result, response_gen, options=None):
+    """
+    Gera a resposta sugerida (ou o handle, no modo lazy) e registra no histórico
+    
+    Usado diretamente pelos caminhos em lote, que serializam o
+    `ClassificationResult` com `to_json(**campos)` sem montar um dict por item.
+    
+    Returns:
+        dict: `suggested_response`, ou `response_id` e `response_url` no modo lazy
+    """
+    options = options or {}
+    store = options.get('store')
+    fields = {}
+    
+    if store is not None:
+        response_id = store.create(email_text, classification_result['category'])
+        fields['response_id'] = response_id
+        fields['response_url'] = f'/api/responses/{response_id}'
+    else:
+        fields['suggested_response'] = response_gen.generate_response(
+            email_text,
+            classification_result['category']
+        )
+    
+    # Gravar antes do prefetch para que a resposta gerada encontre o registro
+    history = options.get('history')
+    if history is not None:
+        history.record(email_text, {
+            'category': classification_result['category'],
+            'confidence': classification_result['confidence'],
+            **fields
+        }, options.get('source'))
+    
+    if store is not None and options.get('prefetch'):
+        store.prefetch(fields['response_id'])
+    
+    return fields
+
+
+def allowed_file(filename, extensions=None):
     """Verifica se o arquivo tem extensão permitida"""
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in {'txt', 'pdf'}
+           filename.rsplit('.', 1)[1].lower() in (extensions or {'txt', 'pdf'})
+
+
+def classify_uploads(files, text_proc, pdf_proc, email_class, response_gen):
+    """
+    Classifica vários arquivos enviados, incluindo emails dentro de ZIPs
+    
+    Os membros dos ZIPs são descompactados um a um em memória (nunca em
+    disco) e despachados concorrentemente para os processadores, com uma
+    janela limitada de itens em andamento.
+    
+    Args:
+        files: Lista de arquivos enviados (.txt, .pdf ou .zip)
+        
+    Returns:
+        tuple: (JSON de cada resultado, na ordem de envio; quantidade de erros).
+            Arquivos com falha trazem o campo `error` em vez da classificação.
+    """
+    options = result_options('upload')
+    archive_proc = ArchiveProcessor(
+        max_members=current_app.config['ARCHIVE_MAX_MEMBERS'],
+        max_member_size=current_app.config['MAX_CONTENT_LENGTH'],
+        max_total_size=current_app.config['ARCHIVE_MAX_TOTAL_SIZE'],
+        max_ratio=current_app.config['ARCHIVE_MAX_RATIO']
+    )
+    filenames = []
+    
+    def iter_documents():
+        for file in files:
+            filename = secure_filename(file.filename)
+            file_extension = filename.rsplit('.', 1)[1].lower()
+            if file_extension == 'zip':
+                for member_name, member_extension, data in archive_proc.iter_members(file):
+                    filenames.append(f'{filename}/{member_name}')
+                    yield filenames[-1], member_extension, data
+            else:
+                filenames.append(filename)
+                yield filename, file_extension, file.read()
+    
+    def process_document(document):
+        filename, file_extension, data = document
+        processor = pdf_proc if file_extension == 'pdf' else text_proc
+        email_text = processor.process_file(io.BytesIO(data))
+        if not email_text or len(email_text.strip()) == 0:
+            raise Exception('Texto do email está vazio')
+        
+        # Serializado assim que termina, direto do ClassificationResult:
+        # apenas o JSON fica em memória
+        classification = email_class.classify(email_text)
+        return classification.to_json(
+            filename=filename,
+            processed_text_length=len(email_text),
+            **response_fields(email_text, classification, response_gen, options)
+        )
+    
+    results = {}
+    errors = 0
+    for index, result, error in bounded_map(process_document, iter_documents(),
+                                            max_workers=current_app.config['UPLOAD_MAX_WORKERS']):
+        if error:
+            errors += 1
+            result = json.dumps({'filename': filenames[index], 'error': str(error)})
+        results[index] = result
+    
+    return [results[index] for index in range(len(filenames))], errors
 
 
 @email_bp.route('/classify', methods=['POST'])
@@ -56,17 +276,29 @@ def classify_email():
     Aceita:
     - text: texto direto do email
     - file: arquivo .txt ou .pdf
+    - file/files (vários) ou arquivo .zip: classificação em lote, com
+      resultados por arquivo em `results`
     """
     try:
         # Inicializar processadores
         text_proc, pdf_proc, email_class, response_gen = get_processors()
         
+        uploads = request.files.getlist('file') + request.files.getlist('files')
+        
         # Verificar se há texto direto
         if request.is_json and 'text' in request.json and request.json['text']:
             email_text = request.json['text']
+        # Verificar se é um envio em lote (vários arquivos ou ZIP)
+        elif len(uploads) > 1 or any(allowed_file(f.filename, {'zip'}) for f in uploads):
+            if not all(allowed_file(f.filename, {'txt', 'pdf', 'zip'}) for f in uploads):
+                return jsonify({'error': 'Tipo de arquivo não permitido. Use .txt, .pdf ou .zip'}), 400
+            
+            results, errors = classify_uploads(uploads, text_proc, pdf_proc, email_class, response_gen)
+            body = f'{{"results": [{", ".join(results)}], "total": {len(results)}, "errors": {errors}}}'
+            return Response(body, status=200, mimetype='application/json')
         # Verificar se há arquivo enviado
-        elif 'file' in request.files:
-            file = request.files['file']
+        elif uploads:
+            file = uploads[0]
             if file.filename == '':
                 return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
             
@@ -93,20 +325,15 @@ def classify_email():
         # Classificar email
         classification_result = email_class.classify(email_text)
         
-        # Gerar resposta automática
-        response_text = response_gen.generate_response(
-            email_text, 
-            classification_result['category']
-        )
+        # Gerar resposta automática (ou handle, no modo lazy)
+        result = build_result(email_text, classification_result, response_gen, result_options('classify'))
+        result['processed_text_length'] = len(email_text)
         
         # Retornar resultado
-        return jsonify({
-            'category': classification_result['category'],
-            'confidence': classification_result['confidence'],
-            'suggested_response': response_text,
-            'processed_text_length': len(email_text)
-        }), 200
+        return jsonify(result), 200
         
+    except ArchiveLimitError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'error': 'Erro ao processar email',
@@ -134,21 +361,201 @@ def classify_text():
         # Classificar email
         classification_result = email_class.classify(email_text)
         
-        # Gerar resposta automática
-        response_text = response_gen.generate_response(
-            email_text, 
-            classification_result['category']
-        )
+        # Gerar resposta automática (ou handle, no modo lazy)
+        return jsonify(build_result(email_text, classification_result, response_gen, result_options('classify/text'))), 200
         
+    except Exception as e:
         return jsonify({
-            'category': classification_result['category'],
-            'confidence': classification_result['confidence'],
-            'suggested_response': response_text
-        }), 200
-        
+            'error': 'Erro ao processar email',
+            'message': str(e)
+        }), 500
+
+
+
+def iter_ndjson_lines(stream, max_line_bytes):
+    """
+    Lê linhas NDJSON do stream sob demanda, sem carregar o corpo inteiro
+    
+    Linhas vazias são ignoradas. Linhas maiores que `max_line_bytes` são
+    descartadas até a quebra de linha e repassadas como None, para que o
+    registro correspondente seja reportado como erro.
+    """
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Consumir o restante da linha longa
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield None
+            continue
+        if line.strip():
+            yield line
+
+
+@email_bp.route('/classify/stream', methods=['POST'])
+def classify_stream():
+    """
+    Endpoint de streaming: recebe emails em NDJSON e devolve resultados em NDJSON
+    
+    Cada linha da requisição é um objeto JSON com `text` (e opcionalmente `id`).
+    Cada linha da resposta traz o `index` da linha de entrada, o `id` enviado e
+    a classificação (ou `error`), na ordem em que os emails terminam de ser
+    processados. Apenas NDJSON_WINDOW emails ficam em andamento por vez: a
+    leitura da requisição pausa enquanto o cliente não consome as respostas,
+    mantendo a memória constante para qualquer quantidade de registros.
+    """
+    try:
+        _, _, email_class, response_gen = get_processors()
+        # O corpo é o fluxo NDJSON: opções só pela query string
+        options = result_options('stream', query_only=True)
     except Exception as e:
         return jsonify({
             'error': 'Erro ao processar email',
             'message': str(e)
         }), 500
+    
+    max_line_bytes = current_app.config['NDJSON_MAX_LINE_BYTES']
+    max_workers = current_app.config['NDJSON_MAX_WORKERS']
+    window = current_app.config['NDJSON_WINDOW']
+    
+    # O corpo pode ser chunked e muito maior que MAX_CONTENT_LENGTH: o limite
+    # aqui é por linha, não pelo corpo inteiro
+    stream = get_input_stream(request.environ, max_content_length=None)
+    
+    def process_line(line):
+        if line is None:
+            raise Exception(f'Linha excede o limite de {max_line_bytes} bytes')
+        
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise Exception('Cada linha deve ser um objeto JSON')
+        
+        email_text = record.get('text')
+        if not email_text or len(str(email_text).strip()) == 0:
+            raise Exception('Texto do email está vazio')
+        
+        classification = email_class.classify(email_text)
+        fields = response_fields(email_text, classification, response_gen, options)
+        if 'id' in record:
+            fields['id'] = record['id']
+        return classification, fields
+    
+    def generate():
+        for index, result, error in bounded_map(process_line, iter_ndjson_lines(stream, max_line_bytes),
+                                                max_workers=max_workers, window=window):
+            if error:
+                yield json.dumps({'index': index, 'error': str(error)}) + '\n'
+                continue
+            classification, fields = result
+            yield classification.to_json(index=index, **fields) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@email_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Endpoint com estatísticas de uso da API do modelo
+    
+    Para o classificador e o gerador: tokens do prefixo fixo reaproveitável
+    pelo cache de prompt do provedor e, havendo roteamento entre modelos,
+    latência e taxa de erro de cada endpoint.
+    """
+    _, _, email_class, response_gen = get_processors()
+    
+    stats = {}
+    for name, component in (('classifier', email_class), ('generator', response_gen)):
+        stats[name] = {'prompt_cache': component.prompt_stats.snapshot()}
+        if component.router is not None:
+            stats[name]['router'] = component.router.stats()
+    
+    return jsonify(stats), 200
+
+
+@email_bp.route('/responses/<response_id>', methods=['GET'])
+def get_response(response_id):
+    """
+    Endpoint para buscar a resposta sugerida de uma classificação lazy
+    
+    A resposta é gerada na primeira busca (ou já está pronta, se houve prefetch)
+    e fica disponível até o TTL expirar.
+    """
+    try:
+        stored = get_response_store().get(response_id)
+        if stored is None:
+            return jsonify({'error': 'Resposta não encontrada ou expirada'}), 404
+        
+        return jsonify(stored), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Erro ao gerar resposta',
+            'message': str(e)
+        }), 500
+
+
+def _timestamp_arg(name):
+    """Lê um instante da query string (timestamp Unix ou ISO 8601)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
 
+@email_bp.route('/history', methods=['GET'])
+def get_history():
+    """
+    Endpoint para consultar o histórico de classificações
+    
+    Filtros na query string: category, since, until (timestamp Unix ou
+    ISO 8601) e content_hash. A paginação é por keyset: envie o
+    `next_cursor` recebido como `cursor` para buscar a próxima página.
+    Registros recentes aparecem após a gravação em lote (HISTORY_FLUSH_INTERVAL).
+    """
+    history = get_history_store()
+    if history is None:
+        return jsonify({'error': 'Histórico desabilitado'}), 404
+    
+    try:
+        limit = min(int(request.args.get('limit', 50)), current_app.config['HISTORY_MAX_PAGE_SIZE'])
+        cursor = request.args.get('cursor')
+        items, next_cursor = history.query(
+            category=request.args.get('category'),
+            since=_timestamp_arg('since'),
+            until=_timestamp_arg('until'),
+            content_hash=request.args.get('content_hash'),
+            cursor=int(cursor) if cursor else None,
+            limit=max(1, limit)
+        )
+    except ValueError as e:
+        return jsonify({'error': 'Parâmetros inválidos', 'message': str(e)}), 400
+    
+    return jsonify({'items': items, 'next_cursor': next_cursor}), 200
+
+
+@email_bp.route('/history/stats', methods=['GET'])
+def get_history_stats():
+    """
+    Endpoint com agregados do histórico por categoria
+    
+    Aceita since/until e bucket ('hour' ou 'day') para séries temporais.
+    """
+    history = get_history_store()
+    if history is None:
+        return jsonify({'error': 'Histórico desabilitado'}), 404
+    
+    try:
+        stats = history.aggregate(
+            since=_timestamp_arg('since'),
+            until=_timestamp_arg('until'),
+            bucket=request.args.get('bucket')
+        )
+    except ValueError as e:
+        return jsonify({'error': 'Parâmetros inválidos', 'message': str(e)}), 400
+    
+    return jsonify(stats), 200
@@ -0,0 +1,56 @@
+"""
+Benchmark de vazão da classificação por palavras-chave: email a email x lote
+
+Uso:
+    python -m benchmarks.keyword_throughput --count 100000 --padding 0
+    python -m benchmarks.keyword_throughput --count 20000 --padding 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.classifiers.email_classifier import EmailClassifier
+
+_FILLER = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor. '
+
+
+def _texts(count, padding, corpus):
+    with open(corpus, encoding='utf-8') as file:
+        base = [json.loads(line)['text'] for line in file if line.strip()]
+    filler = (_FILLER * (padding // len(_FILLER) + 1))[:padding]
+    return [base[index % len(base)] + ' ' + filler for index in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Emails por segundo no caminho por palavras-chave')
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--padding', type=int, default=0, help='Caracteres extras por email')
+    parser.add_argument('--corpus', default='examples/eval_corpus.jsonl')
+    args = parser.parse_args(argv)
+
+    texts = _texts(args.count, args.padding, args.corpus)
+    classifier = EmailClassifier()
+
+    start = time.perf_counter()
+    single = [classifier._fallback_classification(text) for text in texts]
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classifier.classify_many(texts)
+    batch_elapsed = time.perf_counter() - start
+
+    assert batch.categories == [result.category for result in single]
+
+    average = sum(map(len, texts)) / len(texts)
+    print(f"{args.count} emails, {average:.0f} caracteres em média")
+    print(f"  {'_fallback_classification':<26}{args.count / single_elapsed:12,.0f} emails/s")
+    print(f"  {'classify_many':<26}{args.count / batch_elapsed:12,.0f} emails/s"
+          f"   ({single_elapsed / batch_elapsed:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Teste de carga: compara modelos de worker do gunicorn com a OpenAI simulada
+
+Sobe um servidor compatível com a API da OpenAI que responde após uma
+latência fixa (OPENAI_BASE_URL aponta para ele), inicia o gunicorn com cada
+configuração e dispara requisições concorrentes em /api/classify.
+
+Uso:
+    python -m benchmarks.load_test --latency 0.5 --requests 200 --concurrency 32 \
+        --configs sync:2,gthread:2x8,gthread:2x32,gevent:2x100
+
+Configuração: <worker_class>:<workers>[x<threads ou conexões>]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_EMAIL = "Olá, preciso de ajuda com um erro no sistema ao emitir o relatório mensal."
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_openai(latency: float) -> ThreadingHTTPServer:
+    """Servidor /v1/chat/completions que responde após `latency` segundos"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            time.sleep(latency)
+            system = body.get('messages', [{}])[0].get('content', '')
+            content = 'Produtivo\n0.9' if 'Classifique' in system else 'Olá! Vamos verificar o erro.'
+            payload = json.dumps({
+                'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': 100, 'completion_tokens': 10, 'total_tokens': 110}
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', _free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_config(spec: str):
+    """'gthread:2x8' -> ('gthread', 2, 8)"""
+    worker_class, _, sizing = spec.partition(':')
+    workers, _, per_worker = (sizing or '2').partition('x')
+    return worker_class, int(workers), int(per_worker or 1)
+
+
+def _rss_kb(pid: int) -> int:
+    """RSS do processo e dos filhos (Linux; 0 se indisponível)"""
+    total = 0
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            total += next(int(line.split()[1]) for line in file if line.startswith('VmRSS'))
+        with open(f'/proc/{pid}/task/{pid}/children') as file:
+            total += sum(_rss_kb(int(child)) for child in file.read().split())
+    except (OSError, StopIteration):
+        pass
+    return total
+
+
+def run_config(spec: str, base_url: str, requests: int, concurrency: int):
+    worker_class, workers, per_worker = parse_config(spec)
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        FLASK_ENV='production',
+        OPENAI_API_KEY='stub',
+        OPENAI_BASE_URL=base_url,
+        OPENAI_MODELS='',
+        HISTORY_ENABLED='False',
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(per_worker),
+        GUNICORN_WORKER_CONNECTIONS=str(per_worker)
+    )
+    env.pop('OPENAI_MODEL_ROUTES', None)
+
+    log = tempfile.TemporaryFile()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'wsgi:app', '--config', 'gunicorn.conf.py'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        _wait_until_ready(url + '/health', server, log)
+        payload = json.dumps({'text': _EMAIL}).encode('utf-8')
+
+        def one(_):
+            request = urllib.request.Request(url + '/api/classify', data=payload,
+                                             headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=120) as response:
+                    ok = response.status == 200
+                    response.read()
+            except Exception:
+                ok = False
+            return ok, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+        rss_mb = _rss_kb(server.pid) / 1024
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
+
+    latencies = sorted(latency for ok, latency in outcomes if ok)
+    return {
+        'config': spec,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else None,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else None,
+        'errors': sum(1 for ok, _ in outcomes if not ok),
+        'rss_mb': rss_mb
+    }
+
+
+def _wait_until_ready(url: str, server: subprocess.Popen, log, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            log.seek(0)
+            tail = log.read().decode('utf-8', 'replace')[-2000:]
+            raise Exception(f"gunicorn encerrou ao iniciar (código {server.returncode}):\n{tail}")
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except Exception:
+            time.sleep(0.2)
+    raise Exception('gunicorn não respondeu a tempo')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara modelos de worker do gunicorn sob carga')
+    parser.add_argument('--configs', default='sync:2,gthread:2x8,gthread:2x32',
+                        help='Configurações separadas por vírgula (classe:workers[xthreads])')
+    parser.add_argument('--latency', type=float, default=0.5, help='Latência simulada da OpenAI (s)')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--json', action='store_true', help='Imprime os resultados em JSON')
+    args = parser.parse_args(argv)
+
+    stub = start_stub_openai(args.latency)
+    base_url = f'http://127.0.0.1:{stub.server_address[1]}/v1'
+    try:
+        results = [run_config(spec.strip(), base_url, args.requests, args.concurrency)
+                   for spec in args.configs.split(',') if spec.strip()]
+    finally:
+        stub.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.requests} requisições, {args.concurrency} concorrentes, "
+          f"OpenAI simulada com {args.latency}s por chamada (2 chamadas por requisição)")
+    print(f"  {'config':<16}{'req/s':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'erros':>7}{'RSS (MB)':>10}")
+    for result in results:
+        p50 = f"{result['p50']:.2f}" if result['p50'] is not None else '-'
+        p95 = f"{result['p95']:.2f}" if result['p95'] is not None else '-'
+        print(f"  {result['config']:<16}{result['requests_per_second']:8.1f}{p50:>10}{p95:>10}"
+              f"{result['errors']:>7}{result['rss_mb']:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark de memória: bytes por resultado de classificação em cada representação
+
+Uso:
+    python -m benchmarks.result_memory --count 200000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.classifiers.results import CATEGORIES, ClassificationResult, ResultBatch
+
+
+def _raw_results(count):
+    """Resultados como chegam de JSON (ex: histórico, cache): strings não compartilhadas"""
+    rng = random.Random(42)
+    return [
+        json.dumps({'category': rng.choice(CATEGORIES), 'confidence': rng.random()})
+        for _ in range(count)
+    ]
+
+
+def _measure(build, raw):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = build(raw)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(raw), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bytes por resultado em cada representação')
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    raw = _raw_results(args.count)
+
+    def dicts(rows):
+        return [json.loads(row) for row in rows]
+
+    def slotted(rows):
+        out = []
+        for row in rows:
+            item = json.loads(row)
+            out.append(ClassificationResult(item['category'], item['confidence']))
+        return out
+
+    def batch(rows):
+        out = ResultBatch()
+        for row in rows:
+            item = json.loads(row)
+            out.append(item['category'], item['confidence'])
+        return out
+
+    print(f"{args.count} resultados")
+    baseline = None
+    for name, build in (('dict', dicts), ('ClassificationResult', slotted), ('ResultBatch', batch)):
+        per_result, _ = _measure(build, raw)
+        baseline = baseline or per_result
+        print(f"  {name:<22}{per_result:8.1f} bytes/resultado   ({baseline / per_result:5.1f}x menor)")
+
+
+if __name__ == '__main__':
+    main()
@@ -51,7 +51,9 @@ tabButtons.forEach(button => {
 fileInput.addEventListener('change', (e) => {
     const file = e.target.files[0];
     if (file) {
-        fileName.textContent = `Arquivo selecionado: ${file.name}`;
+        fileName.textContent = e.target.files.length > 1
+            ? `${e.target.files.length} arquivos selecionados`
+            : `Arquivo selecionado: ${file.name}`;
         fileName.classList.add('show');
     } else {
         fileName.classList.remove('show');
@@ -97,7 +99,9 @@ function handleDrop(e) {
     
     if (files.length > 0) {
         fileInput.files = files;
-        fileName.textContent = `Arquivo selecionado: ${files[0].name}`;
+        fileName.textContent = files.length > 1
+            ? `${files.length} arquivos selecionados`
+            : `Arquivo selecionado: ${files[0].name}`;
         fileName.classList.add('show');
     }
 }
@@ -121,12 +125,14 @@ classifyButton.addEventListener('click', async () => {
         }
         hasContent = true;
     } else {
-        const file = fileInput.files[0];
-        if (!file) {
+        const files = fileInput.files;
+        if (!files.length) {
             showError('Por favor, selecione um arquivo antes de classificar.');
             return;
         }
-        formData.append('file', file);
+        for (const file of files) {
+            formData.append('file', file);
+        }
         hasContent = true;
     }
     
@@ -166,8 +172,12 @@ classifyButton.addEventListener('click', async () => {
             throw new Error(data.error || 'Erro ao processar email');
         }
         
-        // Mostrar resultados
-        showResults(data);
+        // Mostrar resultados (lote ou email único)
+        if (data.results) {
+            showBatchResults(data);
+        } else {
+            showResults(data);
+        }
         
     } catch (error) {
         console.error('Erro:', error);
@@ -199,6 +209,32 @@ function showResults(data) {
     resultsSection.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
 }
 
+// Função para mostrar resultados de um envio em lote (vários arquivos ou ZIP)
+function showBatchResults(data) {
+    const productive = data.results.filter(r => r.category === 'Produtivo').length;
+    const unproductive = data.results.filter(r => r.category === 'Improdutivo').length;
+    
+    categoryValue.textContent = `${productive} Produtivo(s), ${unproductive} Improdutivo(s)`;
+    categoryValue.className = 'category-value';
+    confidenceBadge.textContent = `${data.total} arquivo(s)`;
+    
+    const classified = data.results.filter(r => !r.error);
+    const averageConfidence = classified.length
+        ? classified.reduce((sum, r) => sum + r.confidence, 0) / classified.length
+        : 0;
+    const confidencePercent = Math.round(averageConfidence * 100);
+    confidenceFill.style.width = `${confidencePercent}%`;
+    confidencePercentage.textContent = `${confidencePercent}% (média)`;
+    
+    responseText.textContent = data.results.map(r => r.error
+        ? `${r.filename}: erro - ${r.error}`
+        : `${r.filename}: ${r.category} (${Math.round(r.confidence * 100)}%)\n${r.suggested_response || ''}`
+    ).join('\n\n');
+    
+    resultsSection.style.display = 'block';
+    resultsSection.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+}
+
 // Função para esconder resultados
 function hideResults() {
     resultsSection.style.display = 'none';
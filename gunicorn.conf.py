@@ -0,0 +1,29 @@
+"""
+Configuração do gunicorn (usada por start.sh)
+
+O modelo de workers vem de backend/config.py (variáveis GUNICORN_*).
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.config import Config
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = Config.GUNICORN_WORKER_CLASS
+workers = Config.GUNICORN_WORKERS
+timeout = Config.GUNICORN_TIMEOUT
+
+if worker_class == 'gthread':
+    threads = Config.GUNICORN_THREADS
+elif worker_class == 'gevent':
+    worker_connections = Config.GUNICORN_WORKER_CONNECTIONS
+
+
+def worker_exit(server, worker):
+    """Grava o histórico ainda na fila antes de o worker encerrar (reinício/deploy)"""
+    from backend.routes import email_routes
+
+    if email_routes.history_store is not None:
+        email_routes.history_store.close(Config.HISTORY_CLOSE_TIMEOUT)
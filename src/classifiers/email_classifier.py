@@ -1,9 +1,10 @@
 """
 Classificador de emails usando OpenAI API quando disponível
 """
+import math
 import os
 import re
-from typing import Any, Dict, Tuple
+from typing import Any, Optional, Tuple
 
 try:
     import openai as openai_module
@@ -15,31 +16,23 @@ try:
 except ImportError:
     OpenAI = None  # type: ignore
 
+from src.classifiers.keywords import score_batch, score_text
+from src.classifiers.results import CATEGORIES, ClassificationResult, ResultBatch
+from src.routing.model_router import ModelRouter
+from src.utils.completions import build_messages, create_completion, is_legacy_openai_sdk, sdk_field
+from src.utils.token_counter import PromptCacheStats, get_token_counter
 
-class EmailClassifier:
-    """Classe para classificar emails em Produtivo ou Improdutivo"""
-    
-    def __init__(self):
-        """Inicializa o classificador"""
-        self.api_key = os.environ.get('OPENAI_API_KEY')
-        self.model = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
-        self._client = None
-        self._legacy_client = None
-        
-        if self.api_key:
-            if openai_module and hasattr(openai_module, "ChatCompletion"):
-                openai_module.api_key = self.api_key
-                self._legacy_client = openai_module
-            elif OpenAI is not None:
-                self._client = OpenAI(api_key=self.api_key)
-            else:
-                # Client indisponível nesta versão da SDK
-                self.api_key = None
-        
-        # Prompts para classificação
-        self.classification_prompt = """Você é um assistente especializado em classificar emails corporativos.
 
-Classifique o seguinte email em uma das duas categorias:
+# Rótulos de um único token usados no modo por logprobs
+LOGPROB_LABELS = {
+    'P': 'Produtivo',
+    'I': 'Improdutivo'
+}
+
+# Descrição das categorias compartilhada pelos prompts
+_CATEGORIES_GUIDE = """Você é um classificador de emails profissional e preciso, especializado em emails corporativos.
+
+Classifique o email enviado pelo usuário em uma das duas categorias:
 
 1. **Produtivo**: Emails que requerem uma ação ou resposta específica
    - Solicitações de suporte técnico
@@ -55,12 +48,58 @@ Classifique o seguinte email em uma das duas categorias:
    - Mensagens informativas sem ação necessária
    - Spam ou conteúdo irrelevante
 
-Responda APENAS com uma das duas palavras: "Produtivo" ou "Improdutivo", seguido de um número entre 0 e 1 representando a confiança da classificação (ex: "Produtivo 0.95").
-
-Email para classificar:
 """
+
+# Instruções fixas, montadas uma única vez: a mensagem de sistema precisa ser
+# idêntica byte a byte entre chamadas para o cache de prompt do provedor
+# funcionar. O email vai sempre em uma mensagem separada, depois do prefixo.
+CLASSIFICATION_SYSTEM_PROMPT = _CATEGORIES_GUIDE + """Responda APENAS com uma das duas palavras: "Produtivo" ou "Improdutivo", seguido de um número entre 0 e 1 representando a confiança da classificação (ex: "Produtivo 0.95")."""
+
+# Prompt de um único token: a confiança vem das probabilidades do modelo
+LABEL_SYSTEM_PROMPT = _CATEGORIES_GUIDE + """Responda APENAS com uma única letra: "P" para Produtivo ou "I" para Improdutivo."""
+
+_CLASSIFICATION_PREFIX = ({"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},)
+_LABEL_PREFIX = ({"role": "system", "content": LABEL_SYSTEM_PROMPT},)
+
+
+class EmailClassifier:
+    """Classe para classificar emails em Produtivo ou Improdutivo"""
+    
+    def __init__(self, mode: Optional[str] = None, router: Optional[ModelRouter] = None):
+        """
+        Inicializa o classificador
+        
+        Args:
+            mode: Modo de classificação via API ('text' ou 'logprobs').
+                Quando omitido, usa a variável OPENAI_CLASSIFY_MODE.
+            router: Roteador entre vários modelos. Quando omitido, é criado a
+                partir de OPENAI_MODEL_ROUTES/OPENAI_MODELS (se houver mais de um).
+        """
+        self.api_key = os.environ.get('OPENAI_API_KEY')
+        self.model = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+        self.mode = (mode or os.environ.get('OPENAI_CLASSIFY_MODE', 'text')).lower()
+        self._client = None
+        self._legacy_client = None
+        
+        if self.api_key:
+            if is_legacy_openai_sdk() and hasattr(openai_module, "ChatCompletion"):
+                openai_module.api_key = self.api_key
+                self._legacy_client = openai_module
+            elif OpenAI is not None:
+                self._client = OpenAI(api_key=self.api_key)
+            else:
+                # Client indisponível nesta versão da SDK
+                self.api_key = None
+        
+        # Roteamento entre modelos só é suportado pela SDK 1.x
+        self.router = router
+        if self.router is None and self._client is not None:
+            self.router = ModelRouter.from_env(self.api_key)
+        
+        # Tokens do prefixo fixo vs. variáveis, para acompanhar o cache de prompt
+        self.prompt_stats = PromptCacheStats(get_token_counter(self.model))
     
-    def classify(self, email_text: str) -> Dict[str, Any]:
+    def classify(self, email_text: str) -> ClassificationResult:
         """
         Classifica um email em Produtivo ou Improdutivo
         
@@ -68,7 +107,7 @@ Email para classificar:
             email_text: Texto do email a ser classificado
             
         Returns:
-            dict: Dicionário com categoria e confiança
+            ClassificationResult: Categoria e confiança, com leitura no formato de dict
                 {
                     'category': 'Produtivo' ou 'Improdutivo',
                     'confidence': float (0-1)
@@ -79,11 +118,13 @@ Email para classificar:
             return self._fallback_classification(email_text)
         
         try:
-            # Preparar prompt
-            full_prompt = self.classification_prompt + email_text
+            # Modo por logprobs exige a SDK 1.x
+            if self.mode == 'logprobs' and self._client is not None:
+                category, confidence = self._classify_with_logprobs(email_text)
+                return ClassificationResult(category, confidence)
             
             # Chamar API da OpenAI
-            response = self._invoke_openai(full_prompt)
+            response = self._invoke_openai(email_text)
             
             # Extrair resposta
             result = response.strip()
@@ -91,28 +132,51 @@ Email para classificar:
             # Processar resposta
             category, confidence = self._parse_response(result)
             
-            return {
-                'category': category,
-                'confidence': confidence
-            }
+            return ClassificationResult(category, confidence)
             
         except Exception:
             # Em caso de erro, usar fallback por palavras-chave
             return self._fallback_classification(email_text)
     
-    def _invoke_openai(self, prompt: str) -> str:
+    def classify_many(self, texts, chunk_size: int = 4096) -> ResultBatch:
+        """
+        Classifica um lote de emails pelas palavras-chave, de uma vez
+
+        Para drenar filas grandes quando a API está indisponível: mesmo
+        resultado de `_fallback_classification` em cada email, mas com a
+        matriz email x palavra-chave e a pontuação calculadas em lote (NumPy).
+        Os emails são processados em blocos de `chunk_size` para limitar a
+        memória.
+
+        Args:
+            texts: Iterável de textos de emails
+            chunk_size: Emails por bloco
+
+        Returns:
+            ResultBatch: Resultados na ordem dos textos
+        """
+        batch = ResultBatch()
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                batch.extend_codes(*score_batch(chunk))
+                chunk = []
+        if chunk:
+            batch.extend_codes(*score_batch(chunk))
+        return batch
+    
+    def _invoke_openai(self, email_text: str) -> str:
         """
         Invoca a API da OpenAI usando o client disponível
         """
-        messages = [
-            {"role": "system", "content": "Você é um classificador de emails profissional e preciso."},
-            {"role": "user", "content": prompt}
-        ]
+        messages = build_messages(_CLASSIFICATION_PREFIX, email_text)
         
         if self._client:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            response = create_completion(
+                self,
+                _CLASSIFICATION_PREFIX,
+                messages,
                 temperature=0.3,
                 max_tokens=50
             )
@@ -132,6 +196,62 @@ Email para classificar:
         
         raise RuntimeError("Cliente OpenAI não configurado.")
     
+    def _classify_with_logprobs(self, email_text: str) -> Tuple[str, float]:
+        """
+        Classifica pedindo um único token de rótulo com logprobs habilitado
+        
+        Args:
+            email_text: Texto do email
+            
+        Returns:
+            tuple: (categoria, confiança)
+        """
+        messages = build_messages(_LABEL_PREFIX, email_text)
+        
+        # `extra_body` mantém compatibilidade com SDKs sem o parâmetro `logprobs`
+        response = create_completion(
+            self,
+            _LABEL_PREFIX,
+            messages,
+            temperature=0,
+            max_tokens=1,
+            extra_body={'logprobs': True, 'top_logprobs': 5}
+        )
+        return self._parse_logprobs(response.choices[0])
+    
+    def _parse_logprobs(self, choice: Any) -> Tuple[str, float]:
+        """
+        Extrai categoria e confiança das probabilidades do primeiro token
+        
+        Args:
+            choice: Item de `choices` retornado pela API
+            
+        Returns:
+            tuple: (categoria, confiança normalizada entre os dois rótulos)
+        """
+        logprobs = sdk_field(choice, 'logprobs')
+        content = sdk_field(logprobs, 'content') if logprobs else None
+        if not content:
+            raise ValueError("Resposta sem logprobs")
+        
+        first_token = content[0]
+        candidates = sdk_field(first_token, 'top_logprobs') or [first_token]
+        
+        # Somar probabilidades por rótulo (ex: "P", " P", "Prod")
+        scores = {category: 0.0 for category in LOGPROB_LABELS.values()}
+        for candidate in candidates:
+            token = (sdk_field(candidate, 'token') or '').strip().strip('"\'').upper()
+            category = LOGPROB_LABELS.get(token[:1])
+            if category:
+                scores[category] += math.exp(sdk_field(candidate, 'logprob'))
+        
+        total = sum(scores.values())
+        if total <= 0:
+            raise ValueError("Nenhum rótulo reconhecido nos logprobs")
+        
+        category = max(scores, key=scores.get)
+        return category, scores[category] / total
+    
     def _parse_response(self, response: str) -> Tuple[str, float]:
         """
         Parse da resposta da API
@@ -171,7 +291,7 @@ Email para classificar:
         
         return category, confidence
     
-    def _fallback_classification(self, email_text: str) -> Dict[str, Any]:
+    def _fallback_classification(self, email_text: str) -> ClassificationResult:
         """
         Classificação básica por palavras-chave quando a API falha
         
@@ -179,40 +299,8 @@ Email para classificar:
             email_text: Texto do email
             
         Returns:
-            dict: Dicionário com categoria e confiança
-        """
-        email_lower = email_text.lower()
-        
-        # Palavras-chave para emails produtivos
-        productive_keywords = [
-            'solicito', 'preciso', 'problema', 'erro', 'bug', 'ajuda',
-            'suporte', 'dúvida', 'questão', 'atualização', 'status',
-            'pedido', 'requisição', 'alteração', 'correção', 'urgente',
-            'request', 'issue', 'problem', 'help', 'support', 'update',
-            'question', 'change', 'fix', 'urgent'
-        ]
-        
-        # Palavras-chave para emails improdutivos
-        unproductive_keywords = [
-            'feliz natal', 'feliz ano novo', 'parabéns', 'congratulações',
-            'obrigado', 'thanks', 'thank you', 'agradeço', 'agradecimento',
-            'felicitações', 'aniversário', 'birthday', 'congratulations',
-            'boas festas', 'happy new year', 'merry christmas'
-        ]
-        
-        # Contar ocorrências
-        productive_count = sum(1 for keyword in productive_keywords if keyword in email_lower)
-        unproductive_count = sum(1 for keyword in unproductive_keywords if keyword in email_lower)
-        
-        # Classificar
-        if unproductive_count > productive_count:
-            category = "Improdutivo"
-            confidence = min(0.9, 0.6 + (unproductive_count * 0.1))
-        else:
-            category = "Produtivo"
-            confidence = min(0.9, 0.6 + (productive_count * 0.1))
-        
-        return {
-            'category': category,
-            'confidence': confidence
-        }
+            ClassificationResult: Categoria e confiança
+        """
+        code, confidence = score_text(email_text)
+        return ClassificationResult(CATEGORIES[code], confidence)
+
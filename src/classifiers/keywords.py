@@ -0,0 +1,140 @@
+"""
+Classificação por palavras-chave (usada quando a API não está disponível)
+"""
+from array import array
+from bisect import bisect_right
+from typing import Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+from src.classifiers.results import CATEGORY_CODES
+
+# Palavras-chave para emails produtivos
+PRODUCTIVE_KEYWORDS = (
+    'solicito', 'preciso', 'problema', 'erro', 'bug', 'ajuda',
+    'suporte', 'dúvida', 'questão', 'atualização', 'status',
+    'pedido', 'requisição', 'alteração', 'correção', 'urgente',
+    'request', 'issue', 'problem', 'help', 'support', 'update',
+    'question', 'change', 'fix', 'urgent'
+)
+
+# Palavras-chave para emails improdutivos
+UNPRODUCTIVE_KEYWORDS = (
+    'feliz natal', 'feliz ano novo', 'parabéns', 'congratulações',
+    'obrigado', 'thanks', 'thank you', 'agradeço', 'agradecimento',
+    'felicitações', 'aniversário', 'birthday', 'congratulations',
+    'boas festas', 'happy new year', 'merry christmas'
+)
+
+KEYWORDS = PRODUCTIVE_KEYWORDS + UNPRODUCTIVE_KEYWORDS
+
+_PRODUCTIVE = CATEGORY_CODES['Produtivo']
+_UNPRODUCTIVE = CATEGORY_CODES['Improdutivo']
+
+# Separador entre emails no texto concatenado (nenhuma palavra-chave o contém,
+# então uma ocorrência nunca atravessa dois emails)
+_SEPARATOR = '\x00'
+
+# Tamanho médio (caracteres) até o qual a busca no texto concatenado compensa
+_JOINED_SCAN_MAX_AVERAGE = 256
+
+
+def keyword_confidence(count: int) -> float:
+    """Confiança a partir do número de palavras-chave encontradas"""
+    return min(0.9, 0.6 + (count * 0.1))
+
+
+def score_text(text: str) -> Tuple[int, float]:
+    """
+    Classifica um email por palavras-chave
+
+    Conta as palavras distintas de cada categoria; Improdutivo só quando tem
+    mais ocorrências que Produtivo. `score_batch` aplica a mesma regra em lote.
+
+    Returns:
+        tuple: (código da categoria, confiança)
+    """
+    lowered = text.lower()
+    productive_count = sum(1 for keyword in PRODUCTIVE_KEYWORDS if keyword in lowered)
+    unproductive_count = sum(1 for keyword in UNPRODUCTIVE_KEYWORDS if keyword in lowered)
+    if unproductive_count > productive_count:
+        return _UNPRODUCTIVE, keyword_confidence(unproductive_count)
+    return _PRODUCTIVE, keyword_confidence(productive_count)
+
+
+def match_matrix(lowered_texts: Sequence[str]):
+    """
+    Matriz documento x palavra-chave: True onde o email contém a palavra
+
+    Emails curtos são concatenados e cada palavra-chave é buscada uma vez no
+    texto inteiro (`str.find`, em C); o trabalho em Python é só por email
+    que contém a palavra, já que a busca salta para o email seguinte a cada
+    ocorrência. Em emails longos o custo é a própria busca, e testar cada
+    email diretamente é mais rápido.
+
+    Args:
+        lowered_texts: Emails já em minúsculas
+
+    Returns:
+        numpy.ndarray: Matriz booleana (emails x KEYWORDS)
+    """
+    count = len(lowered_texts)
+    if sum(map(len, lowered_texts)) > _JOINED_SCAN_MAX_AVERAGE * count:
+        cells = (keyword in text for text in lowered_texts for keyword in KEYWORDS)
+        return np.fromiter(cells, dtype=bool, count=count * len(KEYWORDS)).reshape(count, len(KEYWORDS))
+
+    corpus = _SEPARATOR.join(lowered_texts)
+    starts = []
+    position = 0
+    for text in lowered_texts:
+        starts.append(position)
+        position += len(text) + 1
+    starts.append(position)
+
+    matrix = np.zeros((count, len(KEYWORDS)), dtype=bool)
+    find = corpus.find
+    for column, keyword in enumerate(KEYWORDS):
+        rows = []
+        position = find(keyword)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            rows.append(row)
+            position = find(keyword, starts[row + 1])
+        matrix[rows, column] = True
+    return matrix
+
+
+def score_batch(texts: Sequence[str]) -> Tuple[array, array]:
+    """
+    Classifica um lote por palavras-chave
+
+    Mesmo resultado de `score_text` em cada email, com a matriz email x
+    palavra-chave e a pontuação calculadas de uma vez (NumPy). Sem NumPy,
+    aplica `score_text` email a email.
+
+    Returns:
+        tuple: (códigos das categorias, confianças) prontos para
+            `ResultBatch.extend_codes`
+    """
+    if np is None:
+        codes, confidences = array('B'), array('f')
+        for text in texts:
+            code, confidence = score_text(text)
+            codes.append(code)
+            confidences.append(confidence)
+        return codes, confidences
+
+    matrix = match_matrix([text.lower() for text in texts])
+    productive_count = matrix[:, :len(PRODUCTIVE_KEYWORDS)].sum(axis=1)
+    unproductive_count = matrix[:, len(PRODUCTIVE_KEYWORDS):].sum(axis=1)
+
+    # Versão vetorizada da regra de `score_text`
+    unproductive = unproductive_count > productive_count
+    codes = np.where(unproductive, _UNPRODUCTIVE, _PRODUCTIVE).astype(np.uint8)
+    counts = np.where(unproductive, unproductive_count, productive_count)
+    confidences = np.minimum(0.9, 0.6 + (counts * 0.1)).astype(np.float32)
+
+    return array('B', codes.tobytes()), array('f', confidences.tobytes())
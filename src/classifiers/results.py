@@ -0,0 +1,143 @@
+"""
+Representação compacta dos resultados de classificação
+"""
+import json
+import sys
+from array import array
+from typing import Any, Dict, Iterator
+
+CATEGORIES = ('Produtivo', 'Improdutivo')
+
+# Código numérico de cada categoria (armazenado em 1 byte nos lotes)
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+# Fragmentos JSON pré-montados por categoria
+_JSON_PREFIX = tuple(f'{{"category": {json.dumps(c)}, "confidence": ' for c in CATEGORIES)
+
+
+def _canonical_category(category: str) -> str:
+    """Retorna a instância compartilhada da string da categoria"""
+    code = CATEGORY_CODES.get(category)
+    return CATEGORIES[code] if code is not None else sys.intern(category)
+
+
+def _from_float32(value: float) -> float:
+    """Converte um float32 lido do array para o float mais curto equivalente (0.9, não 0.89999...)"""
+    return float(f'{value:.7g}')
+
+
+class ClassificationResult:
+    """
+    Resultado de uma classificação: categoria e confiança
+
+    Usa `__slots__` e a string de categoria compartilhada, em vez de um dict
+    por resultado. Mantém a interface de leitura de dict (`result['category']`,
+    `get`, `keys`) usada pelas rotas e pelo restante do código.
+    """
+
+    __slots__ = ('category', 'confidence')
+
+    def __init__(self, category: str, confidence: float):
+        self.category = _canonical_category(category)
+        self.confidence = float(confidence)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ClassificationResult, dict)):
+            return other['category'] == self.category and other['confidence'] == self.confidence
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ClassificationResult(category={self.category!r}, confidence={self.confidence!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'category': self.category, 'confidence': self.confidence}
+
+    def to_json(self, **extra: Any) -> str:
+        """
+        Serializa a partir do fragmento JSON pré-montado da categoria
+
+        Args:
+            **extra: Campos acrescentados depois de `confidence` (ex: filename)
+        """
+        code = CATEGORY_CODES.get(self.category)
+        if code is None:
+            return json.dumps({**self.to_dict(), **extra})
+        fields = ''.join(f', {json.dumps(key)}: {json.dumps(value)}' for key, value in extra.items())
+        return f'{_JSON_PREFIX[code]}{self.confidence!r}{fields}}}'
+
+
+class ResultBatch:
+    """
+    Lote de resultados em arrays: 1 byte de categoria + 4 bytes de confiança (float32)
+
+    Para execuções em lote com centenas de milhares de resultados, em vez de
+    uma lista de dicts. Serializa direto para JSON, sem criar objetos por linha.
+    """
+
+    __slots__ = ('_codes', '_confidences')
+
+    def __init__(self, results=None):
+        self._codes = array('B')
+        self._confidences = array('f')
+        for result in results or ():
+            self.append(result['category'], result['confidence'])
+
+    def append(self, category: str, confidence: float):
+        code = CATEGORY_CODES.get(category)
+        if code is None:
+            raise ValueError(f"Categoria desconhecida: {category}")
+        self._codes.append(code)
+        self._confidences.append(confidence)
+
+    def extend_codes(self, codes, confidences):
+        """Adiciona resultados já codificados (sequências de códigos e confianças)"""
+        self._codes.extend(codes)
+        self._confidences.extend(confidences)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __getitem__(self, index: int) -> ClassificationResult:
+        return ClassificationResult(CATEGORIES[self._codes[index]], _from_float32(self._confidences[index]))
+
+    def __iter__(self) -> Iterator[ClassificationResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def categories(self):
+        return [CATEGORIES[code] for code in self._codes]
+
+    @property
+    def confidences(self):
+        return [_from_float32(value) for value in self._confidences]
+
+    def category_counts(self) -> Dict[str, int]:
+        return {category: self._codes.count(code) for category, code in CATEGORY_CODES.items()}
+
+    def iter_json(self) -> Iterator[str]:
+        """Gera o JSON de cada resultado (sem montar dicts intermediários)"""
+        for code, confidence in zip(self._codes, self._confidences):
+            yield f'{_JSON_PREFIX[code]}{_from_float32(confidence)!r}}}'
+
+    def to_json(self) -> str:
+        """Serializa o lote como uma lista JSON"""
+        return '[' + ', '.join(self.iter_json()) + ']'
+
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos dados do lote"""
+        return self._codes.itemsize * len(self._codes) + self._confidences.itemsize * len(self._confidences)
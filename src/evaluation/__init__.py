@@ -0,0 +1,3 @@
+"""
+Evaluation package
+"""
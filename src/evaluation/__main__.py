@@ -0,0 +1,53 @@
+"""
+CLI de avaliação offline dos classificadores
+
+Exemplo:
+    python -m src.evaluation --corpus examples/eval_corpus.jsonl \
+        --backends fallback,openai,openai-logprobs --transport stub --stub-latency 0.2
+"""
+import argparse
+import json
+import os
+import sys
+
+# Adicionar diretório raiz ao path para imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.evaluation.harness import BACKENDS, format_report, run_evaluation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Avaliação offline dos backends de classificação')
+    parser.add_argument('--corpus', default='examples/eval_corpus.jsonl',
+                        help='Corpus rotulado em JSONL (campos text e label)')
+    parser.add_argument('--backends', default='fallback,openai,openai-logprobs',
+                        help=f"Backends separados por vírgula ({', '.join(sorted(BACKENDS))})")
+    parser.add_argument('--transport', choices=['stub', 'replay', 'record'], default='stub',
+                        help='Como os backends da API são atendidos')
+    parser.add_argument('--recordings', help='Arquivo JSONL de gravações (replay/record)')
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help='Latência injetada por chamada no transporte stub (segundos)')
+    parser.add_argument('--workers', type=int, default=8, help='Threads por backend')
+    parser.add_argument('--cache-dir', default='.eval_cache', help='Diretório do cache de resultados')
+    parser.add_argument('--no-cache', action='store_true', help='Ignora e não grava o cache')
+    parser.add_argument('--json', action='store_true', help='Imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    report = run_evaluation(
+        args.corpus,
+        [name.strip() for name in args.backends.split(',') if name.strip()],
+        transport=args.transport,
+        recordings=args.recordings,
+        stub_latency=args.stub_latency,
+        workers=args.workers,
+        cache_dir=None if args.no_cache else args.cache_dir
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,445 @@
+"""
+Avaliação offline dos backends de classificação: acurácia, calibração, vazão e custo
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from src.classifiers.email_classifier import EmailClassifier
+from src.classifiers.results import CATEGORIES, ClassificationResult
+from src.utils.concurrency import bounded_map
+from src.utils.token_counter import get_token_counter
+
+# Registro de backends: nome -> fábrica que recebe as opções e devolve classify(text)
+BACKENDS: Dict[str, Callable[[Dict[str, Any]], Callable[[str], Dict[str, Any]]]] = {}
+
+
+def register_backend(name: str):
+    """Decorador para registrar um backend de classificação (ex: modelos locais)"""
+    def decorator(factory):
+        BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens do texto (tiktoken quando disponível, senão ~4 caracteres por token)"""
+    return get_token_counter().count(text)
+
+
+def load_corpus(path: str) -> List[Dict[str, str]]:
+    """
+    Carrega o corpus rotulado (JSONL com `text` e `label`)
+
+    Returns:
+        list: Itens {'text', 'label'}
+    """
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get('label') not in CATEGORIES:
+                raise ValueError(f"Linha {line_number}: label deve ser um de {CATEGORIES}")
+            corpus.append({'text': item['text'], 'label': item['label']})
+    return corpus
+
+
+class _TokenMeter:
+    """Acumula tokens estimados e erros das chamadas de um transporte (thread-safe)"""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, messages, content, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.input_tokens += sum(estimate_tokens(m['content']) for m in messages)
+            self.output_tokens += estimate_tokens(content or '')
+
+
+def _email_from_messages(messages) -> str:
+    """Recupera o texto do email (última mensagem, depois do prefixo fixo)"""
+    return messages[-1]['content']
+
+
+def _build_response(content: str, logprobs: Optional[Dict[str, Any]] = None):
+    """Monta uma resposta com o mesmo formato da SDK"""
+    choice = SimpleNamespace(message=SimpleNamespace(content=content), logprobs=logprobs)
+    return SimpleNamespace(choices=[choice])
+
+
+class StubTransport:
+    """
+    Transporte stub com a interface `chat.completions.create`
+
+    Responde usando a heurística local (como se fosse o modelo), com latência
+    injetada. Serve para medir a vazão e o custo do caminho da API sem rede.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.meter = _TokenMeter()
+        self._heuristic = EmailClassifier()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages, max_tokens=None, extra_body=None, **kwargs):
+        time.sleep(self.latency)
+        result = self._heuristic._fallback_classification(_email_from_messages(messages))
+        category, confidence = result['category'], result['confidence']
+
+        if extra_body and extra_body.get('logprobs'):
+            label = category[0]
+            other = 'I' if label == 'P' else 'P'
+            content = label
+            logprobs = {'content': [{'token': label, 'logprob': 0.0, 'top_logprobs': [
+                {'token': label, 'logprob': _log(confidence)},
+                {'token': other, 'logprob': _log(1 - confidence)}
+            ]}]}
+        else:
+            content = f"{category} {confidence:.2f}"
+            logprobs = None
+
+        self.meter.add(messages, content)
+        return _build_response(content, logprobs)
+
+
+class RecordedTransport:
+    """
+    Transporte que reproduz respostas gravadas da API
+
+    As gravações ficam em JSONL, indexadas pelo hash das mensagens e dos
+    parâmetros. Com `inner` (client real), chamadas ausentes são feitas na
+    API e gravadas; sem ele, chamadas ausentes falham.
+    """
+
+    def __init__(self, path: str, inner: Any = None):
+        self.path = path
+        self.inner = inner
+        self.meter = _TokenMeter()
+        self.chat = SimpleNamespace(completions=self)
+        self._recordings: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._recordings[record['key']] = record
+
+    @staticmethod
+    def request_key(messages, **params) -> str:
+        payload = json.dumps({'messages': messages, **params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def create(self, messages, model=None, **params):
+        key = self.request_key(messages, **params)
+        record = self._recordings.get(key)
+
+        if record is None:
+            if self.inner is None:
+                self.meter.add(messages, None, error=True)
+                raise KeyError(f"Requisição não gravada: {key[:12]}")
+            record = self._record(key, self.inner.chat.completions.create(
+                model=model, messages=messages, **params
+            ))
+
+        self.meter.add(messages, record['content'])
+        return _build_response(record['content'], record.get('logprobs'))
+
+    def _record(self, key, response):
+        choice = response.choices[0]
+        logprobs = getattr(choice, 'logprobs', None)
+        if logprobs is not None and not isinstance(logprobs, dict):
+            logprobs = logprobs.model_dump()
+        record = {'key': key, 'content': choice.message.content, 'logprobs': logprobs}
+
+        with self._lock:
+            self._recordings[key] = record
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return record
+
+
+def _log(probability: float) -> float:
+    return math.log(max(probability, 1e-9))
+
+
+def _api_classifier(mode: str, transport) -> EmailClassifier:
+    """Cria um classificador que usa o transporte informado no lugar da API"""
+    classifier = EmailClassifier(mode=mode)
+    classifier.api_key = classifier.api_key or 'offline'
+    classifier._client = transport
+    classifier._legacy_client = None
+    classifier.router = None
+    return classifier
+
+
+def _api_backend(mode: str, transport) -> Callable[[str], ClassificationResult]:
+    """
+    Classificação somente pela API, sem o fallback por palavras-chave
+
+    `EmailClassifier.classify` troca qualquer falha da API pela heurística;
+    aqui a falha é propagada para contar como erro e não como resposta do
+    modelo.
+    """
+    classifier = _api_classifier(mode, transport)
+
+    def classify(text: str) -> ClassificationResult:
+        if mode == 'logprobs':
+            category, confidence = classifier._classify_with_logprobs(text)
+        else:
+            category, confidence = classifier._parse_response(classifier._invoke_openai(text).strip())
+        return ClassificationResult(category, confidence)
+
+    # Entra na chave do cache de resultados
+    classify.model = classifier.model
+    return classify
+
+
+@register_backend('fallback')
+def _fallback_backend(options):
+    return EmailClassifier()._fallback_classification
+
+
+@register_backend('openai')
+def _openai_backend(options):
+    return _api_backend('text', options['transport'])
+
+
+@register_backend('openai-logprobs')
+def _openai_logprobs_backend(options):
+    return _api_backend('logprobs', options['transport'])
+
+
+def compute_metrics(labels: List[str], predictions: List[str], confidences: List[float],
+                    bins: int = 10) -> Dict[str, Any]:
+    """
+    Calcula acurácia, matriz de confusão e calibração da confiança
+
+    A calibração usa o ECE (erro de calibração esperado, com `bins` faixas
+    de confiança) e o Brier score da confiança na categoria prevista.
+
+    Returns:
+        dict: {'n', 'accuracy', 'confusion', 'ece', 'brier'}
+    """
+    n = len(labels)
+    confusion = {actual: {predicted: 0 for predicted in CATEGORIES} for actual in CATEGORIES}
+    correct = [label == prediction for label, prediction in zip(labels, predictions)]
+    for label, prediction in zip(labels, predictions):
+        confusion[label][prediction] += 1
+
+    if n == 0:
+        return {'n': 0, 'accuracy': None, 'confusion': confusion, 'ece': None, 'brier': None}
+
+    ece = 0.0
+    for b in range(bins):
+        low, high = b / bins, (b + 1) / bins
+        members = [
+            i for i, c in enumerate(confidences)
+            if low < c <= high or (b == 0 and c == 0)
+        ]
+        if members:
+            accuracy = sum(correct[i] for i in members) / len(members)
+            confidence = sum(confidences[i] for i in members) / len(members)
+            ece += len(members) / n * abs(accuracy - confidence)
+
+    brier = sum((c - int(ok)) ** 2 for c, ok in zip(confidences, correct)) / n
+
+    return {
+        'n': n,
+        'accuracy': sum(correct) / n,
+        'confusion': confusion,
+        'ece': ece,
+        'brier': brier
+    }
+
+
+class ResultCache:
+    """Cache em disco dos resultados de um backend, indexado pelo hash do email"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(self.key(text))
+
+    def put(self, text: str, result: Dict[str, Any]):
+        self._entries[self.key(text)] = result
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+
+
+def evaluate_backend(classify: Callable[[str], Dict[str, Any]], corpus: List[Dict[str, str]],
+                     workers: int = 8, cache: Optional[ResultCache] = None) -> Dict[str, Any]:
+    """
+    Executa o corpus em paralelo por um backend e calcula as métricas
+
+    Itens presentes no cache não são reprocessados e não entram na vazão.
+    Itens cuja classificação falhou ficam fora das métricas, são contados em
+    `errors` e não vão para o cache.
+
+    Returns:
+        dict: Métricas de `compute_metrics` mais vazão e contagens
+    """
+    cache = cache or ResultCache(None)
+    results: List[Optional[ClassificationResult]] = []
+    for item in corpus:
+        cached = cache.get(item['text'])
+        results.append(ClassificationResult(cached['category'], cached['confidence']) if cached else None)
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    errors = 0
+    start = time.perf_counter()
+    for position, result, error in bounded_map(lambda i: classify(corpus[i]['text']), pending,
+                                               max_workers=workers):
+        if error:
+            errors += 1
+            continue
+        index = pending[position]
+        results[index] = ClassificationResult(result['category'], result['confidence'])
+        cache.put(corpus[index]['text'], results[index].to_dict())
+    elapsed = time.perf_counter() - start
+    cache.save()
+
+    answered = [i for i, result in enumerate(results) if result is not None]
+    metrics = compute_metrics(
+        [corpus[i]['label'] for i in answered],
+        [results[i].category for i in answered],
+        [results[i].confidence for i in answered]
+    )
+    completed = len(pending) - errors
+    metrics.update({
+        'computed': completed,
+        'cached': len(corpus) - len(pending),
+        'errors': errors,
+        'seconds': elapsed,
+        'emails_per_second': completed / elapsed if completed and elapsed > 0 else None
+    })
+    return metrics
+
+
+def run_evaluation(corpus_path: str, backends: List[str], transport: str = 'stub',
+                   recordings: Optional[str] = None, stub_latency: float = 0.0,
+                   workers: int = 8, cache_dir: Optional[str] = '.eval_cache') -> Dict[str, Any]:
+    """
+    Avalia cada backend sobre o corpus
+
+    Args:
+        corpus_path: Caminho do corpus JSONL rotulado
+        backends: Nomes dos backends (ver BACKENDS)
+        transport: 'stub', 'replay' (somente gravações) ou 'record' (grava via API real)
+        recordings: Arquivo JSONL de gravações (para replay/record)
+        stub_latency: Latência injetada por chamada no transporte stub (s)
+        workers: Threads por backend
+        cache_dir: Diretório do cache de resultados (None desativa)
+
+    Returns:
+        dict: Métricas por backend
+    """
+    corpus = load_corpus(corpus_path)
+    report = {}
+
+    for name in backends:
+        if name not in BACKENDS:
+            raise ValueError(f"Backend desconhecido: {name}. Disponíveis: {', '.join(sorted(BACKENDS))}")
+
+        transport_client = _make_transport(transport, recordings, stub_latency)
+        classify = BACKENDS[name]({'transport': transport_client})
+
+        cache = None
+        if cache_dir:
+            suffix = '' if name == 'fallback' else f'-{transport}-{_cache_identity(classify, transport, recordings)}'
+            cache = ResultCache(os.path.join(cache_dir, f'{name}{suffix}.json'))
+
+        metrics = evaluate_backend(classify, corpus, workers=workers, cache=cache)
+        if name != 'fallback':
+            meter = transport_client.meter
+            metrics.update({
+                'input_tokens': meter.input_tokens,
+                'output_tokens': meter.output_tokens,
+                'transport_errors': meter.errors
+            })
+        report[name] = metrics
+
+    return report
+
+
+def _cache_identity(classify, transport: str, recordings: Optional[str]) -> str:
+    """
+    Hash do que determina as respostas de um backend da API: modelo e, nos
+    transportes com gravações, o arquivo e seu conteúdo (tamanho e data)
+    """
+    identity = {'model': getattr(classify, 'model', None), 'transport': transport}
+    if transport != 'stub' and recordings:
+        path = os.path.abspath(recordings)
+        stat = os.stat(path) if os.path.exists(path) else None
+        identity['recordings'] = [path, stat.st_size, stat.st_mtime] if stat else [path]
+    payload = json.dumps(identity, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def _make_transport(kind: str, recordings: Optional[str], stub_latency: float):
+    if kind == 'stub':
+        return StubTransport(latency=stub_latency)
+    if not recordings:
+        raise ValueError("Informe o arquivo de gravações para os transportes replay/record")
+    if kind == 'replay':
+        return RecordedTransport(recordings)
+    if kind == 'record':
+        from openai import OpenAI
+        return RecordedTransport(recordings, inner=OpenAI(api_key=os.environ.get('OPENAI_API_KEY')))
+    raise ValueError(f"Transporte desconhecido: {kind}")
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Formata o relatório em texto para o terminal"""
+    lines = []
+    for name, m in report.items():
+        lines.append(f"== {name} ==")
+        lines.append(
+            f"  emails: {m['n']} (calculados: {m['computed']}, cache: {m['cached']}, erros: {m['errors']})"
+        )
+        if m['n']:
+            lines.append(f"  acurácia: {m['accuracy']:.3f}   ECE: {m['ece']:.3f}   Brier: {m['brier']:.3f}")
+        else:
+            lines.append("  acurácia: - (nenhum email classificado)")
+        if m['emails_per_second'] is not None:
+            lines.append(f"  vazão: {m['emails_per_second']:.1f} emails/s")
+        if 'input_tokens' in m:
+            lines.append(
+                f"  tokens estimados: {m['input_tokens']} entrada / {m['output_tokens']} saída"
+                f"   erros de transporte: {m['transport_errors']}"
+            )
+        lines.append("  matriz de confusão (linhas = real, colunas = previsto):")
+        lines.append("    " + " " * 12 + "".join(f"{c:>13}" for c in CATEGORIES))
+        for actual in CATEGORIES:
+            row = "".join(f"{m['confusion'][actual][p]:>13}" for p in CATEGORIES)
+            lines.append(f"    {actual:<12}{row}")
+        lines.append("")
+    return "\n".join(lines)
@@ -2,6 +2,7 @@
 Gerador de respostas automáticas usando OpenAI API (com fallback local)
 """
 import os
+from typing import Optional
 
 try:
     import openai as openai_module
@@ -13,32 +14,20 @@ try:
 except ImportError:
     OpenAI = None  # type: ignore
 
+from src.routing.model_router import ModelRouter
+from src.utils.completions import build_messages, create_completion, is_legacy_openai_sdk
+from src.utils.token_counter import PromptCacheStats, get_token_counter
 
-class ResponseGenerator:
-    """Classe para gerar respostas automáticas baseadas na classificação do email"""
-    
-    def __init__(self):
-        """Inicializa o gerador de respostas"""
-        self.api_key = os.environ.get('OPENAI_API_KEY')
-        self.model = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
-        self._client = None
-        self._legacy_client = None
-        
-        if self.api_key:
-            if openai_module and hasattr(openai_module, "ChatCompletion"):
-                openai_module.api_key = self.api_key
-                self._legacy_client = openai_module
-            elif OpenAI is not None:
-                self._client = OpenAI(api_key=self.api_key)
-            else:
-                self.api_key = None
-        
-        # Templates de prompt por categoria
-        self.productive_prompt = """Você é um assistente profissional de uma empresa do setor financeiro.
 
-Um cliente enviou o seguinte email que foi classificado como **Produtivo** (requer ação ou resposta):
+# Início comum às duas instruções, para maximizar o prefixo compartilhado
+_ASSISTANT_INTRO = """Você é um assistente profissional de uma empresa do setor financeiro, especializado em gerar respostas automáticas para emails.
+
+"""
 
-"{email_text}"
+# Instruções fixas por categoria, montadas uma única vez: a mensagem de sistema
+# precisa ser idêntica byte a byte entre chamadas para o cache de prompt do
+# provedor funcionar. O email do cliente vai em uma mensagem separada.
+PRODUCTIVE_SYSTEM_PROMPT = _ASSISTANT_INTRO + """O cliente enviará um email que foi classificado como **Produtivo** (requer ação ou resposta).
 
 Gere uma resposta profissional, cortês e adequada para este email. A resposta deve:
 - Ser profissional e respeitosa
@@ -49,12 +38,8 @@ Gere uma resposta profissional, cortês e adequada para este email. A resposta d
 - Se for uma dúvida, fornecer informações úteis ou indicar que será respondida em breve
 
 Gere APENAS o texto da resposta, sem saudações adicionais ou explicações."""
-        
-        self.unproductive_prompt = """Você é um assistente profissional de uma empresa do setor financeiro.
-
-Um cliente enviou o seguinte email que foi classificado como **Improdutivo** (não requer ação imediata):
 
-"{email_text}"
+UNPRODUCTIVE_SYSTEM_PROMPT = _ASSISTANT_INTRO + """O cliente enviará um email que foi classificado como **Improdutivo** (não requer ação imediata).
 
 Gere uma resposta breve, profissional e cortês para este email. A resposta deve:
 - Ser profissional e respeitosa
@@ -64,6 +49,44 @@ Gere uma resposta breve, profissional e cortês para este email. A resposta deve
 - Não ser excessivamente longa, já que é uma mensagem que não requer ação
 
 Gere APENAS o texto da resposta, sem saudações adicionais ou explicações."""
+
+_PRODUCTIVE_PREFIX = ({"role": "system", "content": PRODUCTIVE_SYSTEM_PROMPT},)
+_UNPRODUCTIVE_PREFIX = ({"role": "system", "content": UNPRODUCTIVE_SYSTEM_PROMPT},)
+
+
+class ResponseGenerator:
+    """Classe para gerar respostas automáticas baseadas na classificação do email"""
+    
+    def __init__(self, router: Optional[ModelRouter] = None):
+        """
+        Inicializa o gerador de respostas
+        
+        Args:
+            router: Roteador entre vários modelos. Quando omitido, é criado a
+                partir de OPENAI_MODEL_ROUTES/OPENAI_MODELS (se houver mais de um).
+        """
+        self.api_key = os.environ.get('OPENAI_API_KEY')
+        self.model = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+        self._client = None
+        self._legacy_client = None
+        
+        if self.api_key:
+            if is_legacy_openai_sdk() and hasattr(openai_module, "ChatCompletion"):
+                openai_module.api_key = self.api_key
+                self._legacy_client = openai_module
+            elif OpenAI is not None:
+                self._client = OpenAI(api_key=self.api_key)
+            else:
+                self.api_key = None
+        
+        # Roteamento entre modelos só é suportado pela SDK 1.x. As estatísticas
+        # ficam separadas das do classificador: respostas longas têm outra latência.
+        self.router = router
+        if self.router is None and self._client is not None:
+            self.router = ModelRouter.from_env(self.api_key)
+        
+        # Tokens do prefixo fixo vs. variáveis, para acompanhar o cache de prompt
+        self.prompt_stats = PromptCacheStats(get_token_counter(self.model))
     
     def generate_response(self, email_text: str, category: str) -> str:
         """
@@ -80,33 +103,27 @@ Gere APENAS o texto da resposta, sem saudações adicionais ou explicações."""
             return self._generate_fallback_response(category)
         
         try:
-            # Selecionar prompt baseado na categoria
-            if category.lower() == "produtivo":
-                prompt = self.productive_prompt.format(email_text=email_text)
-            else:
-                prompt = self.unproductive_prompt.format(email_text=email_text)
-            
             # Chamar API da OpenAI
-            generated_response = self._invoke_openai(prompt)
+            generated_response = self._invoke_openai(email_text, category)
             return generated_response
             
         except Exception:
             # Em caso de erro, retornar resposta genérica
             return self._generate_fallback_response(category)
     
-    def _invoke_openai(self, prompt: str) -> str:
+    def _invoke_openai(self, email_text: str, category: str) -> str:
         """
         Invoca a API utilizando o client disponível
         """
-        messages = [
-            {"role": "system", "content": "Você é um assistente profissional de uma empresa do setor financeiro, especializado em gerar respostas automáticas para emails."},
-            {"role": "user", "content": prompt}
-        ]
+        # Selecionar prefixo baseado na categoria
+        prefix = _PRODUCTIVE_PREFIX if category.lower() == "produtivo" else _UNPRODUCTIVE_PREFIX
+        messages = build_messages(prefix, email_text)
         
         if self._client:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            response = create_completion(
+                self,
+                prefix,
+                messages,
                 temperature=0.7,
                 max_tokens=300
             )
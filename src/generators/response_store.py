@@ -0,0 +1,230 @@
+"""
+Armazenamento de respostas sugeridas geradas sob demanda (com expiração)
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    response_id TEXT NOT NULL UNIQUE,
+    email_text TEXT,
+    category TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    suggested_response TEXT,
+    claimed_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses (expires_at);
+"""
+
+_SELECT = """
+SELECT email_text, category, expires_at, suggested_response
+FROM responses WHERE response_id = ?
+"""
+
+# Só um processo gera a resposta: quem marcar `claimed_until` primeiro
+_CLAIM = """
+UPDATE responses SET claimed_until = ?
+WHERE response_id = ? AND suggested_response IS NULL
+    AND (claimed_until IS NULL OR claimed_until <= ?)
+"""
+
+
+class ResponseStore:
+    """
+    Guarda handles de respostas e gera o texto apenas quando solicitado
+
+    A classificação devolve um `response_id`; `ResponseGenerator.generate_response`
+    só roda no primeiro `get` (ou em background, quando há prefetch). Handles e
+    respostas ficam em SQLite (WAL) até o TTL expirar, então todos os workers
+    do gunicorn enxergam o mesmo estado e buscas repetidas são gratuitas.
+    """
+
+    def __init__(self, generator, path: str, ttl_seconds: float = 3600, max_entries: int = 10000,
+                 prefetch_workers: int = 2, on_generated=None, claim_seconds: float = 120,
+                 poll_interval: float = 0.05):
+        """
+        Inicializa o armazenamento
+
+        Args:
+            generator: Instância de ResponseGenerator
+            path: Caminho do arquivo SQLite compartilhado entre os workers
+            ttl_seconds: Tempo de vida de cada resposta
+            max_entries: Limite de entradas (as mais antigas saem primeiro)
+            prefetch_workers: Threads usadas para gerar respostas em background
+            on_generated: Callback opcional chamado com (response_id, resposta)
+                quando a resposta é gerada
+            claim_seconds: Tempo após o qual uma geração em andamento em outro
+                worker é considerada abandonada (ex: worker reiniciado)
+            poll_interval: Intervalo (s) ao aguardar a geração em outro worker
+        """
+        self.generator = generator
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prefetch_workers = prefetch_workers
+        self.on_generated = on_generated
+        self.claim_seconds = claim_seconds
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._connect()
+        connection.executescript(_SCHEMA)
+        connection.close()
+
+    def create(self, email_text: str, category: str, prefetch: bool = False) -> str:
+        """
+        Registra um email classificado e retorna o handle da resposta
+
+        Args:
+            email_text: Texto do email original
+            category: Categoria atribuída ao email
+            prefetch: Se True, começa a gerar a resposta em background
+
+        Returns:
+            str: Identificador da resposta
+        """
+        response_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._connection() as connection:
+            connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            # Ids crescentes: remove as mais antigas além do limite
+            connection.execute(
+                "DELETE FROM responses WHERE id <= (SELECT MAX(id) FROM responses) - ?",
+                (self.max_entries - 1,)
+            )
+            connection.execute(
+                "INSERT INTO responses (response_id, email_text, category, expires_at) VALUES (?, ?, ?, ?)",
+                (response_id, email_text, category, now + self.ttl_seconds)
+            )
+
+        if prefetch:
+            self.prefetch(response_id)
+
+        return response_id
+
+    def prefetch(self, response_id: str):
+        """Começa a gerar a resposta em background"""
+        self._get_executor().submit(self.get, response_id)
+
+    def get(self, response_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a resposta, gerando-a se ainda não existir
+
+        Buscas concorrentes no mesmo worker esperam a mesma geração; em outro
+        worker, aguardam a resposta gravada por quem a reivindicou.
+
+        Args:
+            response_id: Identificador devolvido por `create`
+
+        Returns:
+            dict: {'response_id', 'category', 'suggested_response'} ou None se
+                o handle não existe ou expirou
+        """
+        with self._lock:
+            future = self._inflight.get(response_id)
+            owner = future is None
+            if owner:
+                future = self._inflight[response_id] = Future()
+
+        if owner:
+            try:
+                future.set_result(self._resolve(response_id))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[response_id]
+
+        return future.result()
+
+    def _resolve(self, response_id: str) -> Optional[Dict[str, Any]]:
+        """Lê a resposta gravada ou a gera uma única vez entre todos os workers"""
+        connection = self._connection()
+        while True:
+            row = connection.execute(_SELECT, (response_id,)).fetchone()
+            now = time.time()
+            if row is None or row[2] <= now:
+                return None
+
+            email_text, category, _, suggested_response = row
+            if suggested_response is not None:
+                return self._entry(response_id, category, suggested_response)
+
+            with connection:
+                claimed = connection.execute(
+                    _CLAIM, (now + self.claim_seconds, response_id, now)
+                ).rowcount == 1
+            if claimed:
+                break
+            # Outro worker está gerando esta resposta
+            time.sleep(self.poll_interval)
+
+        try:
+            suggested_response = self.generator.generate_response(email_text, category)
+        except Exception:
+            # Permite nova tentativa na próxima busca
+            with connection:
+                connection.execute(
+                    "UPDATE responses SET claimed_until = NULL WHERE response_id = ?", (response_id,)
+                )
+            raise
+
+        # O texto original não é mais necessário
+        with connection:
+            connection.execute(
+                "UPDATE responses SET suggested_response = ?, email_text = NULL, claimed_until = NULL "
+                "WHERE response_id = ?",
+                (suggested_response, response_id)
+            )
+        if self.on_generated is not None:
+            self.on_generated(response_id, suggested_response)
+
+        return self._entry(response_id, category, suggested_response)
+
+    @staticmethod
+    def _entry(response_id: str, category: str, suggested_response: str) -> Dict[str, Any]:
+        return {
+            'response_id': response_id,
+            'category': category,
+            'suggested_response': suggested_response
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Cria o pool de prefetch na primeira utilização"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.prefetch_workers,
+                    thread_name_prefix='response-prefetch'
+                )
+            return self._executor
+
+    def _connection(self) -> sqlite3.Connection:
+        """Uma conexão por thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def __len__(self) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM responses WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        return row[0]
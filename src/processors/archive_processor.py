@@ -0,0 +1,112 @@
+"""
+Processador de arquivos ZIP contendo emails (.txt e .pdf)
+"""
+import io
+import os
+import zipfile
+
+
+class ArchiveLimitError(Exception):
+    """Arquivo ZIP excede os limites de segurança (possível zip bomb)"""
+
+
+class ArchiveProcessor:
+    """Classe para extrair emails de arquivos ZIP sem descompactá-los em disco"""
+
+    def __init__(self, allowed_extensions=None, max_members=1000,
+                 max_member_size=16 * 1024 * 1024, max_total_size=256 * 1024 * 1024,
+                 max_ratio=100, chunk_size=64 * 1024):
+        """
+        Inicializa o processador de arquivos ZIP
+
+        Args:
+            allowed_extensions: Extensões de membros aceitas (padrão: txt e pdf)
+            max_members: Número máximo de membros processados
+            max_member_size: Tamanho máximo descompactado de cada membro (bytes)
+            max_total_size: Tamanho máximo descompactado somando todos os membros
+            max_ratio: Taxa máxima de compressão aceita por membro
+            chunk_size: Tamanho dos blocos lidos do stream descompactado
+        """
+        self.allowed_extensions = allowed_extensions or {'txt', 'pdf'}
+        self.max_members = max_members
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_ratio = max_ratio
+        self.chunk_size = chunk_size
+
+    def iter_members(self, file):
+        """
+        Percorre os emails do ZIP, descompactando um membro por vez em memória
+
+        Os limites são verificados tanto pelos tamanhos declarados no
+        cabeçalho quanto pelos bytes efetivamente lidos, já que o cabeçalho
+        pode mentir.
+
+        Args:
+            file: Arquivo ZIP (objeto com read/seek)
+
+        Yields:
+            tuple: (nome do membro, extensão, conteúdo em bytes)
+        """
+        try:
+            archive = zipfile.ZipFile(file)
+        except zipfile.BadZipFile as e:
+            raise Exception(f"Erro ao ler arquivo ZIP: {str(e)}")
+
+        total_size = 0
+        members = 0
+
+        with archive:
+            for info in archive.infolist():
+                extension = self._member_extension(info)
+                if extension is None:
+                    continue
+
+                members += 1
+                if members > self.max_members:
+                    raise ArchiveLimitError(
+                        f"O arquivo ZIP excede o limite de {self.max_members} emails"
+                    )
+
+                self._check_declared_size(info)
+
+                data = self._read_member(archive, info, self.max_total_size - total_size)
+                total_size += len(data)
+
+                yield os.path.basename(info.filename), extension, data
+
+    def _member_extension(self, info):
+        """Retorna a extensão do membro, ou None se ele deve ser ignorado"""
+        name = os.path.basename(info.filename)
+        # Ignorar diretórios, arquivos ocultos e metadados do macOS
+        if info.is_dir() or not name or name.startswith('.') or '__MACOSX' in info.filename:
+            return None
+        if '.' not in name:
+            return None
+        extension = name.rsplit('.', 1)[1].lower()
+        return extension if extension in self.allowed_extensions else None
+
+    def _check_declared_size(self, info):
+        """Rejeita membros cujo cabeçalho já indica tamanho ou compressão abusivos"""
+        if info.file_size > self.max_member_size:
+            raise ArchiveLimitError(f"O email '{info.filename}' excede o tamanho máximo permitido")
+        if info.compress_size and info.file_size / info.compress_size > self.max_ratio:
+            raise ArchiveLimitError(f"O email '{info.filename}' tem taxa de compressão suspeita")
+
+    def _read_member(self, archive, info, remaining_total):
+        """Descompacta um membro em blocos, interrompendo ao passar dos limites"""
+        limit = min(self.max_member_size, remaining_total)
+        buffer = io.BytesIO()
+
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(self.chunk_size)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+                if buffer.tell() > limit:
+                    if limit == remaining_total:
+                        raise ArchiveLimitError("O conteúdo descompactado do ZIP excede o tamanho máximo permitido")
+                    raise ArchiveLimitError(f"O email '{info.filename}' excede o tamanho máximo permitido")
+
+        return buffer.getvalue()
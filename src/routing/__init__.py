@@ -0,0 +1,3 @@
+"""
+Routing package
+"""
@@ -0,0 +1,301 @@
+"""
+Roteamento entre modelos/endpoints com base em latência, erros e tamanho do email
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None  # type: ignore
+
+# Intervalo (s) para verificar se a chamada mais recente já saiu da fila do pool
+_QUEUE_POLL_INTERVAL = 0.01
+
+
+class LatencyStats:
+    """Estatísticas móveis de latência e erro de um endpoint (thread-safe)"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: Quantidade de chamadas recentes consideradas
+        """
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, error: bool = False):
+        """Registra uma chamada; a latência de chamadas com erro não entra nos percentis"""
+        with self._lock:
+            self._outcomes.append(error)
+            if not error:
+                self._latencies.append(latency)
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Retorna o percentil das latências (ex: 0.95), ou None sem amostras"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'samples': self.samples,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'error_rate': self.error_rate()
+        }
+
+
+class ModelEndpoint:
+    """Um modelo configurado, com o client usado para chamá-lo e suas estatísticas"""
+
+    def __init__(self, name: str, model: str, client: Any = None, base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, max_chars: Optional[int] = None,
+                 timeout: Optional[float] = None, max_retries: Optional[int] = None):
+        """
+        Args:
+            name: Nome do endpoint (usado em logs e estatísticas)
+            model: Nome do modelo enviado à API
+            client: Client compatível com `client.chat.completions.create`.
+                Quando omitido, um client OpenAI é criado com `api_key`/`base_url`.
+            base_url: URL base de uma API compatível com OpenAI (ex: stub local)
+            api_key: Chave da API
+            max_chars: Tamanho máximo de email aceito por este endpoint
+            timeout: Tempo máximo de cada chamada (s) no client criado
+            max_retries: Novas tentativas do SDK no client criado; o próprio
+                roteador já faz failover para o próximo endpoint
+        """
+        self.name = name
+        self.model = model
+        self.max_chars = max_chars
+        self.stats = LatencyStats()
+
+        if client is None and OpenAI is not None:
+            kwargs = {'api_key': api_key}
+            if base_url:
+                kwargs['base_url'] = base_url
+            if timeout is not None:
+                kwargs['timeout'] = timeout
+            if max_retries is not None:
+                kwargs['max_retries'] = max_retries
+            client = OpenAI(**kwargs)
+        self.client = client
+
+    def accepts(self, text_length: int) -> bool:
+        return self.max_chars is None or text_length <= self.max_chars
+
+
+class ModelRouter:
+    """
+    Escolhe o endpoint de cada chamada e aplica hedging contra latência de cauda
+
+    - Emails curtos vão para o endpoint mais rápido (menor p50 observado)
+    - Emails longos seguem a ordem configurada (o primeiro é o preferido)
+    - Endpoints com taxa de erro acima do limite são evitados enquanto houver outros
+    - Hedging: se a chamada não retornar até o p95 observado do endpoint, uma
+      cópia é disparada para o próximo endpoint e vence a primeira resposta.
+      O atraso conta a partir do início da execução, então o tempo na fila do
+      pool (carga alta) não dispara hedges
+    """
+
+    def __init__(self, endpoints: List[ModelEndpoint], short_email_chars: int = 500,
+                 hedging: bool = True, hedge_min_samples: int = 20,
+                 hedge_default_delay: float = 5.0, max_error_rate: float = 0.5,
+                 max_workers: int = 16):
+        """
+        Args:
+            endpoints: Endpoints em ordem de preferência
+            short_email_chars: Até este tamanho o email é considerado curto
+            hedging: Habilita requisições duplicadas para a latência de cauda
+            hedge_min_samples: Amostras necessárias antes de confiar no p95
+            hedge_default_delay: Atraso do hedge (s) enquanto não há amostras suficientes
+            max_error_rate: Taxa de erro a partir da qual o endpoint é evitado
+            max_workers: Threads para chamadas concorrentes (ROUTER_MAX_WORKERS)
+        """
+        if not endpoints:
+            raise ValueError("É necessário ao menos um endpoint")
+        self.endpoints = endpoints
+        self.short_email_chars = short_email_chars
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_default_delay = hedge_default_delay
+        self.max_error_rate = max_error_rate
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-router')
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> Optional['ModelRouter']:
+        """
+        Cria o roteador a partir das variáveis de ambiente
+
+        OPENAI_MODEL_ROUTES aceita uma lista JSON de endpoints
+        (`[{"name": "...", "model": "...", "base_url": "...", "max_chars": 2000}]`);
+        OPENAI_MODELS aceita uma lista simples de modelos separados por vírgula.
+
+        Returns:
+            ModelRouter ou None quando há apenas um modelo configurado
+        """
+        api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        routes = os.environ.get('OPENAI_MODEL_ROUTES')
+        if routes:
+            specs = json.loads(routes)
+        else:
+            models = [m.strip() for m in os.environ.get('OPENAI_MODELS', '').split(',') if m.strip()]
+            specs = [{'model': model} for model in models]
+
+        if len(specs) < 2:
+            return None
+
+        endpoints = [
+            ModelEndpoint(
+                name=spec.get('name') or spec['model'],
+                model=spec['model'],
+                base_url=spec.get('base_url'),
+                api_key=spec.get('api_key') or api_key,
+                max_chars=spec.get('max_chars'),
+                timeout=float(os.environ.get('ROUTER_REQUEST_TIMEOUT', 30.0)),
+                max_retries=int(os.environ.get('ROUTER_MAX_RETRIES', 0))
+            )
+            for spec in specs
+        ]
+        return cls(
+            endpoints,
+            short_email_chars=int(os.environ.get('ROUTER_SHORT_EMAIL_CHARS', 500)),
+            hedging=os.environ.get('ROUTER_HEDGING', 'True').lower() == 'true',
+            hedge_min_samples=int(os.environ.get('ROUTER_HEDGE_MIN_SAMPLES', 20)),
+            hedge_default_delay=float(os.environ.get('ROUTER_HEDGE_DEFAULT_DELAY', 5.0)),
+            max_error_rate=float(os.environ.get('ROUTER_MAX_ERROR_RATE', 0.5)),
+            # Por padrão, uma chamada e um hedge por thread do worker
+            max_workers=int(os.environ.get('ROUTER_MAX_WORKERS',
+                                           2 * int(os.environ.get('GUNICORN_THREADS', 8))))
+        )
+
+    def rank(self, text_length: int) -> List[ModelEndpoint]:
+        """
+        Ordena os endpoints para um email do tamanho informado
+
+        Returns:
+            list: Endpoints do preferido para o menos preferido
+        """
+        candidates = [e for e in self.endpoints if e.accepts(text_length)] or list(self.endpoints)
+        healthy = [e for e in candidates if e.stats.error_rate() <= self.max_error_rate]
+        unhealthy = [e for e in candidates if e not in healthy]
+
+        if text_length <= self.short_email_chars:
+            # Endpoints sem amostras vão primeiro para que sejam medidos
+            healthy.sort(key=lambda e: e.stats.percentile(0.5) or 0.0)
+
+        return healthy + unhealthy
+
+    def call(self, request_fn: Callable[[ModelEndpoint], Any], text_length: int) -> Any:
+        """
+        Executa `request_fn` no melhor endpoint, com hedging e failover
+
+        Args:
+            request_fn: Função que recebe o endpoint e faz a chamada à API
+            text_length: Tamanho do email (usado no roteamento)
+
+        Returns:
+            Resultado da primeira chamada bem-sucedida
+        """
+        ranked = self.rank(text_length)
+        primary, alternates = ranked[0], ranked[1:]
+
+        futures = {}
+        started = self._submit(futures, primary, request_fn)
+        hedge_delay = self._hedge_delay(primary) if self.hedging else None
+        last_error = None
+
+        while futures:
+            timeout = None
+            if alternates and hedge_delay is not None:
+                if started.is_set():
+                    # O atraso do hedge conta a partir do início da execução, não da fila
+                    timeout = max(0.0, started.at + hedge_delay - time.monotonic())
+                else:
+                    # A cópia mais recente ainda está na fila; uma anterior pode responder
+                    timeout = _QUEUE_POLL_INTERVAL
+
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                if not started.is_set() or time.monotonic() < started.at + hedge_delay:
+                    continue
+                # Sem resposta até o p95: disparar uma cópia no próximo endpoint
+                endpoint = alternates.pop(0)
+                started = self._submit(futures, endpoint, request_fn)
+                hedge_delay = self._hedge_delay(endpoint) if self.hedging else None
+                continue
+
+            for future in done:
+                futures.pop(future)
+                if future.exception() is None:
+                    # Cópias ainda na fila não chegam a ser enviadas
+                    for pending in futures:
+                        pending.cancel()
+                    return future.result()
+                last_error = future.exception()
+
+            # Failover: chamada falhou e não há outra em andamento
+            if not futures and alternates:
+                endpoint = alternates.pop(0)
+                started = self._submit(futures, endpoint, request_fn)
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas atuais de cada endpoint"""
+        return {endpoint.name: endpoint.stats.snapshot() for endpoint in self.endpoints}
+
+    def _hedge_delay(self, endpoint: ModelEndpoint) -> float:
+        if endpoint.stats.samples < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return endpoint.stats.percentile(0.95)
+
+    def _submit(self, futures: Dict[Any, ModelEndpoint], endpoint: ModelEndpoint,
+                request_fn: Callable[[ModelEndpoint], Any]) -> '_Started':
+        started = _Started()
+        futures[self._executor.submit(self._timed, endpoint, request_fn, started)] = endpoint
+        return started
+
+    @staticmethod
+    def _timed(endpoint: ModelEndpoint, request_fn: Callable[[ModelEndpoint], Any],
+               started: '_Started') -> Any:
+        started.mark()
+        start = started.at
+        try:
+            result = request_fn(endpoint)
+        except Exception:
+            endpoint.stats.record(time.monotonic() - start, error=True)
+            raise
+        endpoint.stats.record(time.monotonic() - start)
+        return result
+
+
+class _Started(threading.Event):
+    """Sinaliza quando uma chamada sai da fila do pool e começa a executar"""
+
+    at = 0.0
+
+    def mark(self):
+        self.at = time.monotonic()
+        self.set()
@@ -0,0 +1,325 @@
+"""
+Histórico persistente de classificações em SQLite (WAL) com escrita em background
+"""
+import hashlib
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    category TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    text_length INTEGER NOT NULL,
+    source TEXT,
+    response_id TEXT,
+    suggested_response TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_created_at ON classifications (created_at);
+CREATE INDEX IF NOT EXISTS idx_classifications_category ON classifications (category, created_at);
+CREATE INDEX IF NOT EXISTS idx_classifications_content_hash ON classifications (content_hash);
+CREATE INDEX IF NOT EXISTS idx_classifications_response_id ON classifications (response_id);
+"""
+
+_INSERT = """
+INSERT INTO classifications
+    (created_at, category, confidence, content_hash, text_length, source, response_id, suggested_response)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPDATE_RESPONSE = "UPDATE classifications SET suggested_response = ? WHERE response_id = ?"
+
+_COLUMNS = ('id', 'created_at', 'category', 'confidence', 'content_hash', 'text_length',
+            'source', 'response_id', 'suggested_response')
+
+_BUCKETS = {'hour': 3600, 'day': 86400}
+
+# Item colocado na fila por `close()` para encerrar a thread de escrita
+_WAKE_UP = None
+
+
+def content_hash(text: str) -> str:
+    """Hash SHA-256 do texto do email (o texto em si não é armazenado)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class HistoryStore:
+    """
+    Armazena classificações e respostas sugeridas em SQLite
+
+    As escritas entram em uma fila e são gravadas em lote por uma thread de
+    background (write-behind): a requisição nunca espera pelo disco. Se a
+    fila estiver cheia (ou o histórico já foi fechado), o registro é
+    descartado e contabilizado em `dropped`. Chame `close()` ao encerrar o
+    processo para gravar o que ainda está na fila.
+    Leituras usam uma conexão por thread, concorrentes com a escrita (WAL).
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_queue: int = 100000):
+        """
+        Args:
+            path: Caminho do arquivo SQLite
+            batch_size: Máximo de operações por transação
+            flush_interval: Espera máxima (s) para juntar um lote
+            max_queue: Tamanho máximo da fila de escrita
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._close_deadline: Optional[float] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        self._closed = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        connection = self._connect()
+        connection.executescript(_SCHEMA)
+        connection.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def record(self, email_text: str, result: Dict[str, Any], source: Optional[str] = None):
+        """
+        Enfileira uma classificação para gravação (não bloqueia)
+
+        Args:
+            email_text: Texto do email (apenas o hash e o tamanho são gravados)
+            result: Resultado com category, confidence e suggested_response/response_id
+            source: Origem da classificação (ex: rota)
+        """
+        self._enqueue((_INSERT, (
+            time.time(),
+            result['category'],
+            float(result['confidence']),
+            content_hash(email_text),
+            len(email_text),
+            source,
+            result.get('response_id'),
+            result.get('suggested_response')
+        )))
+
+    def update_response(self, response_id: str, suggested_response: str):
+        """Enfileira a resposta gerada depois (modo lazy) para o registro correspondente"""
+        self._enqueue((_UPDATE_RESPONSE, (suggested_response, response_id)))
+
+    def query(self, category: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, content_hash: Optional[str] = None,
+              cursor: Optional[int] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Consulta o histórico do mais recente para o mais antigo (paginação por keyset)
+
+        Args:
+            category: Filtra pela categoria
+            since/until: Intervalo de tempo (timestamp Unix)
+            content_hash: Filtra pelo hash do conteúdo
+            cursor: `next_cursor` da página anterior
+            limit: Itens por página
+
+        Returns:
+            tuple: (itens, next_cursor ou None se não há mais páginas)
+        """
+        where, params = self._filters(category, since, until, content_hash)
+        if cursor is not None:
+            where.append('id < ?')
+            params.append(cursor)
+
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM classifications"
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit + 1)
+
+        rows = self._reader().execute(sql, params).fetchall()
+        items = [dict(zip(_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = items[-1]['id'] if len(rows) > limit else None
+        return items, next_cursor
+
+    def aggregate(self, since: Optional[float] = None, until: Optional[float] = None,
+                  bucket: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Agrega o histórico por categoria (e opcionalmente por hora/dia)
+
+        Returns:
+            dict: {'total', 'by_category': {categoria: {'count', 'avg_confidence'}},
+                   'buckets': [{'bucket', 'category', 'count'}]}
+        """
+        where, params = self._filters(None, since, until, None)
+        clause = (' WHERE ' + ' AND '.join(where)) if where else ''
+        reader = self._reader()
+
+        by_category = {
+            category: {'count': count, 'avg_confidence': avg}
+            for category, count, avg in reader.execute(
+                f"SELECT category, COUNT(*), AVG(confidence) FROM classifications{clause} GROUP BY category",
+                params
+            )
+        }
+
+        buckets = []
+        if bucket:
+            if bucket not in _BUCKETS:
+                raise ValueError(f"bucket deve ser um de {sorted(_BUCKETS)}")
+            size = _BUCKETS[bucket]
+            buckets = [
+                {'bucket': start, 'category': category, 'count': count}
+                for start, category, count in reader.execute(
+                    f"SELECT CAST(created_at / {size} AS INTEGER) * {size} AS start, category, COUNT(*) "
+                    f"FROM classifications{clause} GROUP BY start, category ORDER BY start",
+                    params
+                )
+            ]
+
+        return {
+            'total': sum(item['count'] for item in by_category.values()),
+            'by_category': by_category,
+            'buckets': buckets
+        }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda a gravação de tudo que já foi enfileirado
+
+        Returns:
+            bool: True se a fila foi esvaziada dentro do timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Grava o que estiver pendente e encerra a thread de escrita
+
+        Novos registros passam a ser descartados. O que não for gravado até o
+        timeout também é descartado e contabilizado em `dropped`. Pode ser
+        chamado mais de uma vez (ex: hook do gunicorn e atexit).
+
+        Args:
+            timeout: Espera máxima (s) pela gravação da fila
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._close_deadline = None if timeout is None else time.monotonic() + timeout
+            self._closed.set()
+        try:
+            # Acorda a thread de escrita sem esperar o flush_interval
+            self._queue.put_nowait(_WAKE_UP)
+        except queue.Full:
+            pass
+        self._writer.join(timeout)
+
+    def _enqueue(self, operation):
+        # Sob o lock: nada entra na fila depois que close() começou
+        with self._lock:
+            if self._closed.is_set():
+                self.dropped += 1
+                return
+            try:
+                self._queue.put_nowait(operation)
+            except queue.Full:
+                self.dropped += 1
+
+    def _drop(self, count: int):
+        # Chamado pelas threads das requisições e pela thread de escrita
+        with self._lock:
+            self.dropped += count
+
+    def _write_loop(self):
+        connection = self._connect()
+        while True:
+            closing = self._closed.is_set()
+            if closing and self._close_deadline is not None and time.monotonic() >= self._close_deadline:
+                break
+            try:
+                # Ao fechar, grava até a fila esvaziar sem esperar novos itens
+                operation = self._queue.get(block=not closing, timeout=self.flush_interval)
+            except queue.Empty:
+                if closing:
+                    break
+                continue
+
+            # Juntar o que já está na fila (sem esperar) até o tamanho do lote
+            batch = []
+            while True:
+                if operation is _WAKE_UP:
+                    self._queue.task_done()
+                else:
+                    batch.append(operation)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    operation = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+
+            try:
+                # Uma transação por lote; operações consecutivas iguais em um executemany
+                with connection:
+                    for sql, group in itertools.groupby(batch, key=lambda op: op[0]):
+                        connection.executemany(sql, [params for _, params in group])
+            except sqlite3.Error:
+                self._drop(len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        # Prazo de close() esgotado: o que ficou na fila é descartado
+        leftover = 0
+        while True:
+            try:
+                operation = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if operation is not _WAKE_UP:
+                leftover += 1
+            self._queue.task_done()
+        self._drop(leftover)
+        connection.close()
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    @staticmethod
+    def _filters(category, since, until, content_hash_value):
+        where, params = [], []
+        if category:
+            where.append('category = ?')
+            params.append(category)
+        if since is not None:
+            where.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('created_at < ?')
+            params.append(until)
+        if content_hash_value:
+            where.append('content_hash = ?')
+            params.append(content_hash_value)
+        return where, params
@@ -0,0 +1,66 @@
+"""
+Chamadas de chat completion compartilhadas pelo classificador e pelo gerador
+"""
+from typing import Any
+
+try:
+    import openai as openai_module
+except ImportError:
+    openai_module = None  # type: ignore
+
+
+def build_messages(prefix, email_text: str):
+    """Monta as mensagens: prefixo fixo pré-montado seguido do email do usuário"""
+    return [*prefix, {"role": "user", "content": email_text}]
+
+
+def create_completion(owner, prefix, messages, **params):
+    """
+    Cria a completion no modelo configurado ou, havendo roteador, no
+    endpoint escolhido por ele (com hedging), e registra o uso do prefixo
+
+    Args:
+        owner: EmailClassifier ou ResponseGenerator (usa `_client`, `router`,
+            `model` e `prompt_stats`)
+        prefix: Tupla pré-montada com as mensagens fixas
+        messages: Mensagens de `build_messages(prefix, email)`
+        **params: Parâmetros da chamada (temperature, max_tokens, ...)
+    """
+    if owner.router is not None:
+        response = owner.router.call(
+            lambda endpoint: endpoint.client.chat.completions.create(
+                model=endpoint.model,
+                messages=messages,
+                **params
+            ),
+            len(messages[-1]['content'])
+        )
+    else:
+        response = owner._client.chat.completions.create(
+            model=owner.model,
+            messages=messages,
+            **params
+        )
+
+    owner.prompt_stats.observe(prefix, messages, response)
+    return response
+
+
+def is_legacy_openai_sdk() -> bool:
+    """
+    Indica se a SDK instalada é a legada (< 1.0)
+
+    A SDK 1.x ainda expõe `openai.ChatCompletion` como um proxy que falha
+    ao ser usado, então a versão é a única verificação confiável.
+    """
+    if openai_module is None:
+        return False
+    version = getattr(openai_module, '__version__', '0')
+    return version.split('.')[0] == '0'
+
+
+def sdk_field(obj: Any, name: str) -> Any:
+    """Lê um campo de objetos da SDK ou de dicionários (campos extras na SDK antiga); None se ausente"""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
@@ -0,0 +1,45 @@
+"""
+Utilitários de concorrência para processamento em lote
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+
+def bounded_map(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 4,
+                window: Optional[int] = None) -> Iterator[Tuple[int, Any, Optional[BaseException]]]:
+    """
+    Aplica `func` aos itens em paralelo, mantendo uma janela limitada em andamento
+
+    Os itens são consumidos sob demanda: no máximo `window` itens ficam em
+    memória ao mesmo tempo, independentemente do tamanho de `items`. Os
+    resultados são produzidos na ordem em que terminam.
+
+    Args:
+        func: Função aplicada a cada item
+        items: Iterável (possivelmente infinito ou preguiçoso) de itens
+        max_workers: Número de threads
+        window: Máximo de itens em andamento (padrão: 2x o número de threads)
+
+    Yields:
+        tuple: (índice do item, resultado, exceção ou None)
+    """
+    window = max(1, window or max_workers * 2)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bounded-map') as executor:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                index = pending.pop(future)
+                error = future.exception()
+                yield index, (None if error else future.result()), error
+
+        for index, item in enumerate(items):
+            pending[executor.submit(func, item)] = index
+            # Janela cheia: esperar algum item terminar antes de ler o próximo
+            if len(pending) >= window:
+                yield from drain(FIRST_COMPLETED)
+
+        while pending:
+            yield from drain(FIRST_COMPLETED)
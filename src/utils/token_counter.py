@@ -0,0 +1,130 @@
+"""
+Contagem de tokens e estatísticas de reaproveitamento do prefixo dos prompts
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # type: ignore
+
+from src.utils.completions import sdk_field
+
+
+class TokenCounter:
+    """
+    Conta tokens com o tokenizer do modelo (tiktoken) quando disponível
+
+    Sem tiktoken, ou sem acesso ao arquivo de encoding, usa a estimativa de
+    ~4 caracteres por token. `exact` indica qual dos dois está em uso.
+    """
+
+    def __init__(self, model: str = 'gpt-3.5-turbo'):
+        self.model = model
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = _safe_get_encoding('cl100k_base')
+            except Exception:
+                # Encoding indisponível (ex: sem rede para baixar o arquivo)
+                self._encoding = None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        """Número de tokens do texto"""
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, len(text) // 4)
+
+    def count_messages(self, messages) -> int:
+        """Número de tokens do conteúdo de uma lista de mensagens"""
+        return sum(self.count(message['content']) for message in messages)
+
+
+def _safe_get_encoding(name: str):
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+_counters: Dict[str, TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(model: str = 'gpt-3.5-turbo') -> TokenCounter:
+    """Retorna um contador compartilhado por modelo (carregar o encoding é caro)"""
+    with _counters_lock:
+        if model not in _counters:
+            _counters[model] = TokenCounter(model)
+        return _counters[model]
+
+
+class PromptCacheStats:
+    """
+    Acompanha quanto da entrada de cada chamada é prefixo fixo (reaproveitável
+    pelo cache de prompt do provedor) e quanto o provedor reportou em cache
+
+    O prefixo é a tupla pré-montada de mensagens fixas; a última mensagem é o
+    email. Os tokens de cada prefixo são contados uma única vez, indexados
+    pela identidade da tupla (sem remontar o texto a cada chamada).
+    """
+
+    def __init__(self, counter: Optional[TokenCounter] = None):
+        self.counter = counter or get_token_counter()
+        self.calls = 0
+        self.prefix_tokens = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        # id(prefixo) -> (prefixo, tokens); guardar a tupla mantém o id válido
+        self._prefix_sizes: Dict[int, Tuple[tuple, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, prefix: tuple, messages, response: Any = None):
+        """
+        Registra uma chamada à API
+
+        Args:
+            prefix: Tupla pré-montada com as mensagens fixas
+            messages: Mensagens enviadas (prefixo fixo + email)
+            response: Resposta da API; seu `usage` é usado quando presente
+        """
+        with self._lock:
+            known = self._prefix_sizes.get(id(prefix))
+        prefix_tokens = known[1] if known is not None else self.counter.count_messages(prefix)
+
+        usage = sdk_field(response, 'usage')
+        input_tokens = sdk_field(usage, 'prompt_tokens')
+        if not isinstance(input_tokens, int):
+            input_tokens = prefix_tokens + self.counter.count(messages[-1]['content'])
+        cached_tokens = sdk_field(sdk_field(usage, 'prompt_tokens_details'), 'cached_tokens')
+
+        with self._lock:
+            self._prefix_sizes[id(prefix)] = (prefix, prefix_tokens)
+            self.calls += 1
+            self.prefix_tokens += prefix_tokens
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens if isinstance(cached_tokens, int) else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'tokenizer': 'tiktoken' if self.counter.exact else 'estimate',
+                'calls': self.calls,
+                'distinct_prefixes': len(self._prefix_sizes),
+                'prefix_tokens': self.prefix_tokens,
+                'input_tokens': self.input_tokens,
+                # Fração da entrada que é prefixo fixo, reaproveitável pelo cache
+                'prefix_reuse_ratio': self.prefix_tokens / self.input_tokens if self.input_tokens else 0.0,
+                # Tokens que o provedor reportou como servidos do cache
+                'provider_cached_tokens': self.cached_tokens
+            }
+
@@ -0,0 +1,3 @@
+"""
+Watcher package
+"""
@@ -0,0 +1,92 @@
+"""
+CLI do watcher de Maildir/diretório de entrada
+
+Exemplos:
+    python -m src.watcher ~/Maildir --jsonl data/classificacoes.jsonl
+    python -m src.watcher /srv/entrada --output sidecar --no-responses
+    python -m src.watcher ~/Maildir --jsonl saida.jsonl --once   # processa o pendente e sai
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+# Adicionar diretório raiz ao path para imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from src.watcher.maildir_watcher import MaildirWatcher
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classifica emails novos de um Maildir ou diretório')
+    parser.add_argument('root', help='Maildir (com new/ e cur/) ou diretório de entrada (.txt, .pdf, .eml)')
+    parser.add_argument('--output', choices=['jsonl', 'sidecar'], default='jsonl',
+                        help='Resultados em um arquivo JSONL ou em um .classification.json por email')
+    parser.add_argument('--jsonl', default=os.environ.get('WATCHER_JSONL_PATH', 'data/watcher_results.jsonl'),
+                        help='Arquivo JSONL de saída')
+    parser.add_argument('--state-db', default=os.environ.get('WATCHER_STATE_DB', 'data/watcher_state.db'),
+                        help='Banco SQLite com os arquivos já processados')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WATCHER_WORKERS', 4)),
+                        help='Emails processados em paralelo')
+    parser.add_argument('--poll-interval', type=float,
+                        default=float(os.environ.get('WATCHER_POLL_INTERVAL', 2.0)),
+                        help='Intervalo entre varreduras sem inotify (segundos)')
+    parser.add_argument('--debounce', type=float, default=float(os.environ.get('WATCHER_DEBOUNCE', 0.5)),
+                        help='Espera para agrupar rajadas de emails (segundos)')
+    parser.add_argument('--no-responses', action='store_true', help='Grava apenas a classificação')
+    parser.add_argument('--poll', action='store_true', help='Usa varredura mesmo com inotify disponível')
+    parser.add_argument('--once', action='store_true', help='Processa o que está pendente e sai')
+    parser.add_argument('--history-db', help='Registra as classificações também no histórico da API')
+    args = parser.parse_args(argv)
+
+    history = None
+    if args.history_db:
+        from src.storage.history_store import HistoryStore
+        history = HistoryStore(args.history_db)
+
+    if args.output == 'jsonl':
+        os.makedirs(os.path.dirname(os.path.abspath(args.jsonl)), exist_ok=True)
+
+    watcher = MaildirWatcher(
+        args.root,
+        state_path=args.state_db,
+        output=args.output,
+        jsonl_path=args.jsonl,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        debounce=args.debounce,
+        generate_responses=not args.no_responses,
+        use_inotify=not args.poll,
+        history=history
+    )
+
+    try:
+        if args.once:
+            records = watcher.run_once()
+            print(f"{len(records)} arquivo(s) processado(s), {watcher.errors} erro(s)")
+            return
+
+        stop_event = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop_event.set())
+
+        mode = 'inotify' if watcher.use_inotify else f'varredura a cada {args.poll_interval}s'
+        kind = 'Maildir' if watcher.maildir else 'diretório'
+        print(f"Monitorando {kind} {watcher.root} ({mode}); {len(watcher.state)} arquivo(s) já processado(s)")
+        watcher.run(stop_event)
+        print(f"Encerrado: {watcher.processed} processado(s), {watcher.errors} erro(s)")
+    finally:
+        watcher.close()
+        if history is not None:
+            history.close()
+
+
+if __name__ == '__main__':
+    main()
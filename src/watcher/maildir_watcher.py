@@ -0,0 +1,446 @@
+"""
+Monitoramento de Maildir ou diretório de entrada: classifica emails assim que chegam
+"""
+import email
+import email.policy
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None  # type: ignore
+
+from src.classifiers.email_classifier import EmailClassifier
+from src.generators.response_generator import ResponseGenerator
+from src.processors.pdf_processor import PDFProcessor
+from src.processors.text_processor import TextProcessor
+from src.utils.concurrency import bounded_map
+
+# Extensões aceitas em diretórios de entrada (no Maildir, todo arquivo é um email)
+DROP_EXTENSIONS = ('.txt', '.pdf', '.eml')
+
+SIDECAR_SUFFIX = '.classification.json'
+
+# Subdiretório do Maildir onde ficam os resultados no modo sidecar (os clientes
+# de email só leem new/, cur/ e tmp/)
+MAILDIR_SIDECAR_DIR = 'classifications'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed_files (
+    root TEXT NOT NULL,
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    processed_at REAL NOT NULL,
+    category TEXT,
+    confidence REAL,
+    error TEXT,
+    PRIMARY KEY (root, key)
+);
+"""
+
+_UPSERT = """
+INSERT OR REPLACE INTO processed_files
+    (root, key, path, size, mtime, processed_at, category, confidence, error)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+
+
+class _Candidate(NamedTuple):
+    """Arquivo encontrado no diretório e ainda não processado"""
+    path: str
+    key: str
+    size: int
+    mtime: float
+
+
+def is_maildir(path: str) -> bool:
+    """Indica se o diretório tem a estrutura de um Maildir (new/ e cur/)"""
+    return os.path.isdir(os.path.join(path, 'new')) and os.path.isdir(os.path.join(path, 'cur'))
+
+
+def message_text(raw: bytes) -> str:
+    """
+    Extrai assunto e corpo de uma mensagem RFC 822
+
+    Prefere a parte text/plain; sem ela, usa text/html sem as tags.
+    """
+    message = email.message_from_bytes(raw, policy=email.policy.default)
+    parts = [str(message.get('subject', '') or '')]
+
+    body = message.get_body(preferencelist=('plain', 'html'))
+    if body is not None:
+        content = body.get_content()
+        if body.get_content_subtype() == 'html':
+            content = _HTML_TAG.sub(' ', content)
+        parts.append(content)
+
+    return '\n'.join(part for part in parts if part)
+
+
+class ProcessedState:
+    """
+    Registro em SQLite dos arquivos já processados
+
+    Os arquivos conhecidos ficam também em memória, então uma varredura
+    completa do diretório não consulta o banco arquivo por arquivo.
+    """
+
+    def __init__(self, path: str, root: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.root = root
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+        self._known = {
+            key: (size, mtime)
+            for key, size, mtime in self._connection.execute(
+                'SELECT key, size, mtime FROM processed_files WHERE root = ?', (root,)
+            )
+        }
+
+    def is_processed(self, key: str, size: int, mtime: float, check_signature: bool = True) -> bool:
+        """
+        Indica se o arquivo já foi processado
+
+        Args:
+            check_signature: Se True, um arquivo com tamanho ou data de
+                modificação diferentes é considerado novo (foi sobrescrito)
+        """
+        signature = self._known.get(key)
+        if signature is None:
+            return False
+        return not check_signature or signature == (size, mtime)
+
+    def mark(self, records: Iterable[Dict[str, Any]]):
+        """Registra um lote de arquivos processados em uma única transação"""
+        rows = []
+        for record in records:
+            self._known[record['key']] = (record['size'], record['mtime'])
+            rows.append((
+                self.root, record['key'], record['path'], record['size'], record['mtime'],
+                record['processed_at'], record.get('category'), record.get('confidence'),
+                record.get('error')
+            ))
+        if rows:
+            with self._connection:
+                self._connection.executemany(_UPSERT, rows)
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def close(self):
+        self._connection.close()
+
+
+class _InotifySource:
+    """Eventos de arquivos completos (escritos ou movidos para o diretório) via inotify"""
+
+    def __init__(self, directories: List[str], debounce: float):
+        self._inotify = inotify_simple.INotify()
+        self._directories = {}
+        self._debounce_ms = int(debounce * 1000)
+        mask = inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO
+        for directory in directories:
+            self._directories[self._inotify.add_watch(directory, mask)] = directory
+
+    def read(self, timeout: float):
+        """
+        Espera por eventos e junta a rajada que chegar em seguida
+
+        Returns:
+            tuple: (caminhos, overflow) — overflow indica que eventos foram
+                perdidos e o diretório precisa ser varrido
+        """
+        events = self._inotify.read(timeout=int(timeout * 1000), read_delay=self._debounce_ms)
+        paths, overflow = [], False
+        for event in events:
+            if event.mask & inotify_simple.flags.Q_OVERFLOW:
+                overflow = True
+            elif event.wd in self._directories and event.name:
+                paths.append(os.path.join(self._directories[event.wd], event.name))
+        return paths, overflow
+
+    def close(self):
+        self._inotify.close()
+
+
+class MaildirWatcher:
+    """
+    Monitora um Maildir (new/ e cur/) ou um diretório de entrada e classifica
+    cada email novo com o mesmo pipeline da API
+
+    Usa inotify quando disponível (pacote `inotify_simple`, Linux) e varredura
+    periódica como alternativa. Os arquivos processados ficam registrados em
+    SQLite, então reinícios só classificam o que chegou nesse meio-tempo.
+    Rajadas de emails são agrupadas e processadas em paralelo.
+    """
+
+    def __init__(self, root: str, state_path: str, output: str = 'jsonl',
+                 jsonl_path: Optional[str] = None, workers: int = 4,
+                 poll_interval: float = 2.0, debounce: float = 0.5,
+                 settle_seconds: float = 1.0, rescan_interval: float = 300.0,
+                 generate_responses: bool = True, use_inotify: bool = True,
+                 classifier: Optional[EmailClassifier] = None,
+                 generator: Optional[ResponseGenerator] = None, history=None):
+        """
+        Args:
+            root: Maildir ou diretório de entrada
+            state_path: Arquivo SQLite com o registro dos arquivos processados
+            output: 'jsonl' (um arquivo com todos os resultados) ou 'sidecar'
+                (um `.classification.json` ao lado de cada email)
+            jsonl_path: Arquivo JSONL de saída (obrigatório no modo jsonl)
+            workers: Emails processados em paralelo
+            poll_interval: Intervalo entre varreduras quando não há inotify (s)
+            debounce: Espera para juntar uma rajada de eventos do inotify (s)
+            settle_seconds: Idade mínima de um arquivo no diretório de entrada
+                antes de ser lido na varredura (evita ler arquivos ainda sendo
+                gravados). No Maildir a entrega já é atômica
+            rescan_interval: Varredura completa periódica no modo inotify (s)
+            generate_responses: Se False, grava apenas a classificação
+            use_inotify: Se False, força o modo de varredura
+            classifier/generator: Instâncias a reutilizar (padrão: novas)
+            history: HistoryStore opcional onde as classificações são registradas
+        """
+        if output not in ('jsonl', 'sidecar'):
+            raise ValueError("output deve ser 'jsonl' ou 'sidecar'")
+        if output == 'jsonl' and not jsonl_path:
+            raise ValueError('jsonl_path é obrigatório no modo jsonl')
+        if not os.path.isdir(root):
+            raise Exception(f"Diretório não encontrado: {root}")
+
+        self.root = os.path.abspath(root)
+        self.maildir = is_maildir(self.root)
+        self.output = output
+        self.jsonl_path = jsonl_path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.settle_seconds = 0.0 if self.maildir else settle_seconds
+        self.rescan_interval = rescan_interval
+        self.generate_responses = generate_responses
+        self.use_inotify = use_inotify and inotify_simple is not None
+        self.history = history
+
+        self.text_processor = TextProcessor()
+        self.pdf_processor = PDFProcessor()
+        self.classifier = classifier or EmailClassifier()
+        self.generator = generator or (ResponseGenerator() if generate_responses else None)
+        self.state = ProcessedState(state_path, self.root)
+
+        self.processed = 0
+        self.errors = 0
+
+    @property
+    def directories(self) -> List[str]:
+        """Diretórios monitorados"""
+        if self.maildir:
+            return [os.path.join(self.root, 'new'), os.path.join(self.root, 'cur')]
+        return [self.root]
+
+    def scan(self) -> List[_Candidate]:
+        """Varre os diretórios e retorna os arquivos ainda não processados"""
+        now = time.time()
+        candidates = []
+        for directory in self.directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    candidate = self._candidate(entry.path, entry.name, entry, now)
+                    if candidate is not None:
+                        candidates.append(candidate)
+        return candidates
+
+    def process(self, candidates: List[_Candidate]) -> List[Dict[str, Any]]:
+        """
+        Processa um lote de arquivos em paralelo e grava os resultados
+
+        Returns:
+            list: Registros gravados (com 'error' para os que falharam)
+        """
+        records, results = [], []
+        for index, record, error in bounded_map(self._handle, candidates, max_workers=self.workers):
+            candidate = candidates[index]
+            if isinstance(error, FileNotFoundError):
+                # Movido (ex: new/ -> cur/) ou removido antes da leitura: a
+                # próxima varredura encontra o arquivo no novo caminho
+                continue
+            if error is not None:
+                self.errors += 1
+                record = {'path': candidate.path, 'error': str(error)}
+            else:
+                self.processed += 1
+                results.append(record)
+
+            record.update(key=candidate.key, size=candidate.size, mtime=candidate.mtime,
+                          processed_at=time.time())
+            records.append(record)
+
+        self._write_outputs(results)
+        self.state.mark(records)
+        return records
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """Processa o que está pendente no diretório e retorna (ex: uso via cron)"""
+        return self.process(self.scan())
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        """
+        Monitora o diretório até `stop_event` ser sinalizado
+
+        Começa processando o que chegou enquanto o watcher estava parado.
+        """
+        stop_event = stop_event or threading.Event()
+        source = _InotifySource(self.directories, self.debounce) if self.use_inotify else None
+        try:
+            self.run_once()
+            last_scan = time.monotonic()
+            while not stop_event.is_set():
+                if source is None:
+                    if stop_event.wait(self.poll_interval):
+                        break
+                    candidates = self.scan()
+                else:
+                    paths, overflow = source.read(timeout=min(1.0, self.rescan_interval))
+                    if overflow or time.monotonic() - last_scan >= self.rescan_interval:
+                        candidates = self.scan()
+                        last_scan = time.monotonic()
+                    else:
+                        candidates = self._candidates_for(paths)
+
+                if candidates:
+                    self.process(candidates)
+        finally:
+            if source is not None:
+                source.close()
+
+    def close(self):
+        self.state.close()
+
+    def extract_text(self, path: str) -> str:
+        """Lê o arquivo e extrai o texto do email (txt, pdf ou mensagem RFC 822)"""
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, 'rb') as file:
+            if extension == '.pdf':
+                return self.pdf_processor.process_file(file)
+            if extension == '.txt':
+                return self.text_processor.process_file(file)
+            raw = file.read()
+
+        message = email.message_from_bytes(raw, policy=email.policy.default)
+        text = self.text_processor.clean_text(message_text(raw))
+
+        # Anexos PDF entram no texto classificado
+        for part in message.iter_attachments():
+            if part.get_content_type() == 'application/pdf':
+                try:
+                    text += '\n' + self.pdf_processor.process_file(io.BytesIO(part.get_content()))
+                except Exception:
+                    continue
+        return text
+
+    def _handle(self, candidate: _Candidate) -> Dict[str, Any]:
+        """Pipeline de um arquivo: extração -> classificação -> resposta sugerida"""
+        email_text = self.extract_text(candidate.path)
+        if not email_text or not email_text.strip():
+            raise Exception('Nenhum texto encontrado no email')
+
+        classification = self.classifier.classify(email_text)
+        record = {
+            'path': candidate.path,
+            'category': classification['category'],
+            'confidence': classification['confidence']
+        }
+        if self.generator is not None:
+            record['suggested_response'] = self.generator.generate_response(
+                email_text, classification['category']
+            )
+
+        if self.history is not None:
+            self.history.record(email_text, record, source='watcher')
+        return record
+
+    def _candidates_for(self, paths: List[str]) -> List[_Candidate]:
+        """Converte caminhos recebidos do inotify em candidatos pendentes"""
+        candidates = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # settle não se aplica: o evento já indica que a escrita terminou
+            candidate = self._candidate(path, os.path.basename(path), stat, None)
+            if candidate is not None:
+                candidates[candidate.path] = candidate
+        return list(candidates.values())
+
+    def _candidate(self, path: str, name: str, entry, now: Optional[float]) -> Optional[_Candidate]:
+        """Monta o candidato se o arquivo deve ser processado (entry: DirEntry ou stat_result)"""
+        if name.startswith('.') or name.endswith(SIDECAR_SUFFIX):
+            return None
+        if not self.maildir and not name.lower().endswith(DROP_EXTENSIONS):
+            return None
+
+        try:
+            if isinstance(entry, os.DirEntry):
+                if not entry.is_file():
+                    return None
+                stat = entry.stat()
+            else:
+                stat = entry
+        except FileNotFoundError:
+            return None
+
+        if self.maildir:
+            # O nome único antes de ':' se mantém quando o cliente move a
+            # mensagem de new/ para cur/ ou altera as flags
+            key = name.split(':', 1)[0]
+            processed = self.state.is_processed(key, stat.st_size, stat.st_mtime, check_signature=False)
+        else:
+            key = os.path.relpath(path, self.root)
+            processed = self.state.is_processed(key, stat.st_size, stat.st_mtime)
+            if not processed and now is not None and now - stat.st_mtime < self.settle_seconds:
+                # Ainda pode estar sendo gravado: fica para a próxima varredura
+                return None
+
+        if processed:
+            return None
+        return _Candidate(path, key, stat.st_size, stat.st_mtime)
+
+    def _write_outputs(self, records: List[Dict[str, Any]]):
+        """Grava os resultados do lote no JSONL ou em arquivos sidecar"""
+        fields = ('path', 'category', 'confidence', 'suggested_response', 'processed_at')
+        outputs = [{name: record[name] for name in fields if name in record} for record in records]
+
+        if self.output == 'jsonl':
+            if outputs:
+                with open(self.jsonl_path, 'a', encoding='utf-8') as file:
+                    file.writelines(json.dumps(output, ensure_ascii=False) + '\n' for output in outputs)
+            return
+
+        for output in outputs:
+            if self.maildir:
+                directory = os.path.join(self.root, MAILDIR_SIDECAR_DIR)
+                os.makedirs(directory, exist_ok=True)
+                name = os.path.basename(output['path']).split(':', 1)[0]
+                sidecar = os.path.join(directory, name + SIDECAR_SUFFIX)
+            else:
+                sidecar = output['path'] + SIDECAR_SUFFIX
+
+            # Grava em arquivo temporário e renomeia: leitores nunca veem JSON parcial
+            temporary = sidecar + '.tmp'
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump(output, file, ensure_ascii=False, indent=2)
+            os.replace(temporary, sidecar)
@@ -1,6 +1,7 @@
 """
 Testes unitários para o classificador de emails
 """
+import math
 import pytest
 import os
 from src.classifiers.email_classifier import EmailClassifier
@@ -55,3 +56,102 @@ def test_parse_response_improdutivo(classifier):
     assert category == "Improdutivo"
     assert 0 <= confidence <= 1
 
+
+
+class _StubCompletions:
+    """Stub de `client.chat.completions` que devolve logprobs fixos"""
+    
+    def __init__(self, top_logprobs):
+        self.top_logprobs = top_logprobs
+        self.calls = []
+    
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        choice = {
+            'message': {'role': 'assistant', 'content': self.top_logprobs[0]['token']},
+            'logprobs': {'content': [{
+                'token': self.top_logprobs[0]['token'],
+                'logprob': self.top_logprobs[0]['logprob'],
+                'top_logprobs': self.top_logprobs
+            }]}
+        }
+        return type('Response', (), {'choices': [choice]})()
+
+
+def _logprob_classifier(top_logprobs):
+    classifier = EmailClassifier(mode='logprobs')
+    completions = _StubCompletions(top_logprobs)
+    chat = type('Chat', (), {'completions': completions})()
+    classifier._client = type('Client', (), {'chat': chat})()
+    classifier._legacy_client = None
+    return classifier, completions
+
+
+def test_logprobs_classification_improdutivo():
+    """Testa modo logprobs: confiança vem das probabilidades normalizadas"""
+    os.environ['OPENAI_API_KEY'] = 'test-key'
+    classifier, completions = _logprob_classifier([
+        {'token': 'I', 'logprob': math.log(0.6)},
+        {'token': 'P', 'logprob': math.log(0.2)},
+        {'token': 'X', 'logprob': math.log(0.1)}
+    ])
+    result = classifier.classify("Feliz Natal!")
+    
+    assert result['category'] == 'Improdutivo'
+    assert result['confidence'] == pytest.approx(0.75)
+    assert completions.calls[0]['max_tokens'] == 1
+
+
+def test_logprobs_without_label_uses_fallback():
+    """Testa que rótulos irreconhecíveis caem na classificação por palavras-chave"""
+    os.environ['OPENAI_API_KEY'] = 'test-key'
+    classifier, _ = _logprob_classifier([{'token': '?', 'logprob': 0.0}])
+    result = classifier.classify("Preciso de ajuda com um erro no sistema")
+    
+    assert result == classifier._fallback_classification("Preciso de ajuda com um erro no sistema")
+
+
+def test_static_prefix_is_identical_across_calls():
+    """Testa que o prefixo de sistema é o mesmo objeto/bytes e o email vai separado"""
+    os.environ['OPENAI_API_KEY'] = 'test-key'
+    classifier, completions = _logprob_classifier([{'token': 'P', 'logprob': 0.0}])
+    classifier.classify("Primeiro email")
+    classifier.classify("Segundo email, bem diferente")
+
+    first, second = (call['messages'] for call in completions.calls)
+    assert first[:-1] == second[:-1]
+    assert first[0]['role'] == 'system'
+    assert second[-1] == {'role': 'user', 'content': 'Segundo email, bem diferente'}
+
+    stats = classifier.prompt_stats.snapshot()
+    assert stats['calls'] == 2
+    assert stats['distinct_prefixes'] == 1
+    assert 0 < stats['prefix_reuse_ratio'] < 1
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_classify_many_matches_fallback(classifier, monkeypatch, use_numpy):
+    """Testa que o lote vetorizado dá o mesmo resultado da classificação email a email"""
+    from src.classifiers import keywords
+    if not use_numpy:
+        monkeypatch.setattr(keywords, 'np', None)
+
+    texts = [
+        "Preciso de ajuda com um problema no sistema. O erro ocorre no login.",
+        "Feliz Natal e um próspero Ano Novo! Obrigado por tudo.",
+        "",
+        "Reunião amanhã às 10h",
+        "URGENTE: bug na atualização, preciso de suporte! Obrigado",
+        "Thank you and happy new year, merry christmas! Parabéns pelo aniversário",
+        "problema\x00obrigado",
+        "fix",
+        "Segue o relatório. " * 30 + "Obrigado pela ajuda com o erro"
+    ] * 3
+
+    expected = [classifier._fallback_classification(text) for text in texts]
+
+    # Blocos pequenos: emails curtos (texto concatenado) e bloco com email longo (por email)
+    for chunk_size in (1, 4, len(texts)):
+        batch = classifier.classify_many(texts, chunk_size=chunk_size)
+        assert len(batch) == len(texts)
+        assert list(batch) == expected
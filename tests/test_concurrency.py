@@ -0,0 +1,42 @@
+"""
+Testes dos utilitários de concorrência
+"""
+import threading
+
+from src.utils.concurrency import bounded_map
+
+
+def test_bounded_map_limits_items_in_flight():
+    """Testa que no máximo `window` itens são lidos à frente dos resultados"""
+    lock = threading.Lock()
+    state = {'read': 0, 'done': 0, 'max_ahead': 0}
+
+    def items():
+        for i in range(100):
+            with lock:
+                state['read'] += 1
+                state['max_ahead'] = max(state['max_ahead'], state['read'] - state['done'])
+            yield i
+
+    results = {}
+    for index, result, error in bounded_map(lambda x: x * 2, items(), max_workers=2, window=3):
+        with lock:
+            state['done'] += 1
+        results[index] = result
+
+    assert results == {i: i * 2 for i in range(100)}
+    assert state['max_ahead'] <= 3
+
+
+def test_bounded_map_reports_errors_per_item():
+    """Testa que a falha de um item não interrompe os demais"""
+    def func(x):
+        if x == 1:
+            raise ValueError('falhou')
+        return x
+
+    outcomes = {index: (result, error) for index, result, error in bounded_map(func, [0, 1, 2])}
+
+    assert outcomes[0] == (0, None)
+    assert isinstance(outcomes[1][1], ValueError)
+    assert outcomes[2] == (2, None)
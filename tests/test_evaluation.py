@@ -0,0 +1,72 @@
+"""
+Testes do harness de avaliação offline
+"""
+import json
+
+import pytest
+
+from src.evaluation.harness import compute_metrics, run_evaluation
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    path = tmp_path / 'corpus.jsonl'
+    rows = [
+        {'text': 'Preciso de ajuda com um erro no sistema', 'label': 'Produtivo'},
+        {'text': 'Feliz Natal e obrigado por tudo', 'label': 'Improdutivo'},
+        {'text': 'Segue o convite para o café de sexta', 'label': 'Improdutivo'}
+    ]
+    path.write_text('\n'.join(json.dumps(row) for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def test_compute_metrics():
+    """Testa acurácia, matriz de confusão e Brier em um caso conhecido"""
+    metrics = compute_metrics(
+        ['Produtivo', 'Improdutivo', 'Improdutivo'],
+        ['Produtivo', 'Improdutivo', 'Produtivo'],
+        [1.0, 1.0, 1.0]
+    )
+
+    assert metrics['accuracy'] == pytest.approx(2 / 3)
+    assert metrics['confusion']['Improdutivo']['Produtivo'] == 1
+    assert metrics['brier'] == pytest.approx(1 / 3)
+    assert metrics['ece'] == pytest.approx(1 / 3)
+
+
+def test_run_evaluation_uses_cache(corpus_path, tmp_path):
+    """Testa que a segunda execução reaproveita o cache de resultados"""
+    cache_dir = str(tmp_path / 'cache')
+    first = run_evaluation(corpus_path, ['fallback', 'openai'], cache_dir=cache_dir)
+    second = run_evaluation(corpus_path, ['fallback', 'openai'], cache_dir=cache_dir)
+
+    assert first['fallback']['computed'] == 3
+    assert first['openai']['input_tokens'] > 0
+    assert second['fallback']['cached'] == 3
+    assert second['openai']['accuracy'] == first['openai']['accuracy']
+
+
+def test_replay_without_recordings_counts_transport_errors(corpus_path, tmp_path):
+    """Testa que chamadas não gravadas contam como erro, sem cair no fallback nem ir para o cache"""
+    cache_dir = str(tmp_path / 'cache')
+    recordings = str(tmp_path / 'vazio.jsonl')
+    for _ in range(2):
+        report = run_evaluation(corpus_path, ['openai'], transport='replay',
+                                recordings=recordings, cache_dir=cache_dir)
+
+        assert report['openai']['transport_errors'] == 3
+        assert report['openai']['errors'] == 3
+        assert report['openai']['cached'] == 0
+        assert report['openai']['n'] == 0
+        assert report['openai']['accuracy'] is None
+
+
+def test_cache_is_keyed_by_model(corpus_path, tmp_path, monkeypatch):
+    """Testa que trocar o modelo não reaproveita resultados de outro modelo"""
+    cache_dir = str(tmp_path / 'cache')
+    run_evaluation(corpus_path, ['openai'], cache_dir=cache_dir)
+    monkeypatch.setenv('OPENAI_MODEL', 'outro-modelo')
+    report = run_evaluation(corpus_path, ['openai'], cache_dir=cache_dir)
+
+    assert report['openai']['cached'] == 0
+    assert report['openai']['computed'] == 3
@@ -0,0 +1,61 @@
+"""
+Testes do histórico em SQLite com escrita em background
+"""
+import sqlite3
+import threading
+
+from src.storage.history_store import HistoryStore
+
+_RESULT = {'category': 'Produtivo', 'confidence': 0.8}
+
+
+def _count(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute('SELECT COUNT(*) FROM classifications').fetchone()[0]
+
+
+def test_close_writes_pending_records(tmp_path):
+    """Testa que close() grava a fila e pode ser chamado de novo (hook + atexit)"""
+    path = str(tmp_path / 'history.db')
+    history = HistoryStore(path, flush_interval=60)
+    for index in range(100):
+        history.record(f'email {index}', _RESULT)
+
+    history.close()
+    history.close()
+    history.record('depois de fechar', _RESULT)
+
+    assert _count(path) == 100
+    assert history.dropped == 1
+
+    # Fechamento com timeout: o que não foi gravado a tempo entra em `dropped`
+    path = str(tmp_path / 'timeout.db')
+    history = HistoryStore(path, batch_size=1, flush_interval=60)
+    for index in range(20000):
+        history.record(f'email {index}', _RESULT)
+
+    history.close(timeout=0.05)
+    history.flush()
+
+    assert history.dropped > 0
+    assert _count(path) + history.dropped == 20000
+
+
+def test_dropped_counts_every_discarded_record(tmp_path):
+    """Testa o contador de descartes com várias threads enchendo a fila"""
+    path = str(tmp_path / 'history.db')
+    history = HistoryStore(path, max_queue=5)
+
+    def worker():
+        for index in range(200):
+            history.record(f'email {index}', _RESULT)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    history.close()
+
+    assert history.dropped > 0
+    assert _count(path) + history.dropped == 1600
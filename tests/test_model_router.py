@@ -0,0 +1,121 @@
+"""
+Testes do roteamento entre modelos com endpoints stub que injetam latência
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.routing.model_router import ModelEndpoint, ModelRouter
+
+
+class StubEndpointClient:
+    """Client stub compatível com `chat.completions.create` com latência configurável"""
+
+    def __init__(self, name, latency=0.0, fail=False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f'{self.name} indisponível')
+        return self.name
+
+
+def _endpoint(name, **kwargs):
+    return ModelEndpoint(name, name, client=StubEndpointClient(name, **kwargs))
+
+
+def _call(router, text_length=1000):
+    return router.call(lambda e: e.client.chat.completions.create(model=e.model), text_length)
+
+
+def test_short_emails_go_to_fastest_endpoint():
+    """Testa que emails curtos usam o endpoint com menor latência observada"""
+    slow, fast = _endpoint('lento', latency=0.05), _endpoint('rapido', latency=0.001)
+    router = ModelRouter([slow, fast], short_email_chars=100, hedging=False)
+    for _ in range(3):
+        slow.stats.record(0.05)
+        fast.stats.record(0.001)
+
+    assert _call(router, text_length=50) == 'rapido'
+    assert _call(router, text_length=5000) == 'lento'
+
+
+def test_hedge_fires_after_p95_and_takes_first_answer():
+    """Testa que uma chamada acima do p95 é duplicada no endpoint alternativo"""
+    primary, alternate = _endpoint('primario', latency=0.5), _endpoint('alternativo', latency=0.01)
+    router = ModelRouter([primary, alternate], short_email_chars=0, hedge_min_samples=5)
+    for _ in range(10):
+        primary.stats.record(0.02)
+
+    start = time.monotonic()
+    result = _call(router)
+    elapsed = time.monotonic() - start
+
+    assert result == 'alternativo'
+    assert elapsed < 0.3
+    assert primary.client.calls == 1 and alternate.client.calls == 1
+
+
+def test_queue_wait_does_not_fire_hedges():
+    """Testa que o tempo na fila do pool não conta para o atraso do hedge"""
+    primary, alternate = _endpoint('primario', latency=0.05), _endpoint('alternativo', latency=0.05)
+    router = ModelRouter([primary, alternate], short_email_chars=0, hedge_min_samples=5, max_workers=2)
+    for _ in range(10):
+        primary.stats.record(0.2)
+
+    # 16 chamadas em 2 threads: as últimas esperam ~0.35 s na fila antes de executar
+    with ThreadPoolExecutor(max_workers=16) as callers:
+        results = list(callers.map(lambda _: _call(router), range(16)))
+
+    assert results == ['primario'] * 16
+    assert alternate.client.calls == 0
+
+
+def test_queued_hedge_does_not_delay_primary_answer():
+    """Testa que um hedge parado na fila do pool não atrasa a resposta do primário"""
+    primary = _endpoint('primario', latency=0.1)
+    router = ModelRouter([primary, _endpoint('b', latency=0.01), _endpoint('c', latency=0.01)],
+                         short_email_chars=0, hedge_min_samples=5, max_workers=2)
+    for _ in range(10):
+        primary.stats.record(0.02)
+
+    def request_fn(endpoint):
+        if endpoint is primary:
+            # Trabalho enfileirado antes do hedge: o pool fica saturado
+            router._executor.submit(time.sleep, 1.0)
+        return endpoint.client.chat.completions.create(model=endpoint.model)
+
+    router._executor.submit(time.sleep, 1.0)
+    start = time.monotonic()
+    result = router.call(request_fn, 1000)
+    elapsed = time.monotonic() - start
+
+    assert result == 'primario'
+    assert elapsed < 0.5
+
+
+def test_failover_to_alternate_on_error():
+    """Testa que erro no endpoint preferido é coberto pelo próximo"""
+    broken, healthy = _endpoint('quebrado', fail=True), _endpoint('saudavel')
+    router = ModelRouter([broken, healthy], short_email_chars=0, hedging=False)
+
+    assert _call(router) == 'saudavel'
+    assert broken.stats.error_rate() == 1.0
+    # Com a taxa de erro acima do limite, o endpoint quebrado deixa de ser o primeiro
+    assert router.rank(1000)[0] is healthy
+
+
+def test_all_endpoints_failing_raises():
+    """Testa que a última falha é propagada quando nenhum endpoint responde"""
+    router = ModelRouter([_endpoint('a', fail=True), _endpoint('b', fail=True)], hedging=False)
+
+    with pytest.raises(RuntimeError):
+        _call(router)
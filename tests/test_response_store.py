@@ -0,0 +1,71 @@
+"""
+Testes do armazenamento de respostas sob demanda compartilhado entre workers
+"""
+import threading
+import time
+
+from src.generators.response_store import ResponseStore
+
+
+class CountingGenerator:
+    """Gerador stub que conta as chamadas e demora para responder"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_response(self, email_text, category):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f'{category}: {email_text}'
+
+
+def test_handles_are_visible_to_other_workers(tmp_path):
+    """Testa que um handle criado em um worker é resolvido por outro"""
+    generator = CountingGenerator()
+    path = str(tmp_path / 'responses.db')
+    first, second = ResponseStore(generator, path), ResponseStore(generator, path)
+
+    response_id = first.create('Preciso de ajuda', 'Produtivo')
+    stored = second.get(response_id)
+
+    assert stored == {'response_id': response_id, 'category': 'Produtivo',
+                      'suggested_response': 'Produtivo: Preciso de ajuda'}
+    assert first.get(response_id) == stored
+    assert generator.calls == 1
+    assert second.get('inexistente') is None
+
+
+def test_concurrent_gets_across_workers_generate_once(tmp_path):
+    """Testa que buscas simultâneas em vários workers geram a resposta uma única vez"""
+    generator = CountingGenerator(delay=0.1)
+    path = str(tmp_path / 'responses.db')
+    stores = [ResponseStore(generator, path, poll_interval=0.01) for _ in range(2)]
+    response_id = stores[0].create('Status do pedido?', 'Produtivo')
+
+    results = []
+    threads = [threading.Thread(target=lambda store=store: results.append(store.get(response_id)))
+               for store in stores for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert generator.calls == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+
+
+def test_expired_and_evicted_handles(tmp_path):
+    """Testa expiração pelo TTL e o limite de entradas"""
+    generator = CountingGenerator()
+    path = str(tmp_path / 'responses.db')
+
+    expired = ResponseStore(generator, path, ttl_seconds=0)
+    assert expired.get(expired.create('Obrigado!', 'Improdutivo')) is None
+
+    store = ResponseStore(generator, path, max_entries=2)
+    ids = [store.create(f'email {index}', 'Produtivo') for index in range(3)]
+    assert store.get(ids[0]) is None
+    assert len(store) == 2
@@ -0,0 +1,43 @@
+"""
+Testes da representação compacta de resultados
+"""
+import json
+
+from src.classifiers.results import CATEGORIES, ClassificationResult, ResultBatch
+
+
+def test_classification_result_reads_like_dict():
+    """Testa compatibilidade com o acesso em formato de dict"""
+    result = ClassificationResult(''.join(['Produ', 'tivo']), 0.9)
+
+    assert result['category'] == 'Produtivo'
+    assert result.category is CATEGORIES[0]
+    assert result.get('inexistente') is None
+    assert dict(result) == {'category': 'Produtivo', 'confidence': 0.9}
+    assert result == {'category': 'Produtivo', 'confidence': 0.9}
+
+
+def test_classification_result_to_json_with_extra_fields():
+    """Testa a serialização direta com campos extras (caminhos em lote)"""
+    result = ClassificationResult('Improdutivo', 0.8)
+    extra = {'filename': 'emails.zip/natal.txt', 'suggested_response': 'Obrigado! 🎄'}
+
+    assert json.loads(result.to_json()) == {'category': 'Improdutivo', 'confidence': 0.8}
+    assert result.to_json(**extra) == json.dumps({**result.to_dict(), **extra})
+
+
+def test_result_batch_round_trip_and_json():
+    """Testa armazenamento em float32 e serialização direta para JSON"""
+    batch = ResultBatch([
+        ClassificationResult('Produtivo', 0.9),
+        {'category': 'Improdutivo', 'confidence': 0.75}
+    ])
+
+    assert len(batch) == 2
+    assert batch.nbytes() == 10
+    assert batch.confidences == [0.9, 0.75]
+    assert batch.category_counts() == {'Produtivo': 1, 'Improdutivo': 1}
+    assert json.loads(batch.to_json()) == [
+        {'category': 'Produtivo', 'confidence': 0.9},
+        {'category': 'Improdutivo', 'confidence': 0.75}
+    ]
@@ -0,0 +1,231 @@
+"""
+Testes das rotas da API
+"""
+import io
+import json
+import threading
+import time
+import zipfile
+
+import pytest
+
+from backend.app import create_app
+from backend.routes import email_routes
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """Fixture com a aplicação de testes usando apenas a classificação local"""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    for name in ('text_processor', 'pdf_processor', 'email_classifier',
+                 'response_generator', 'response_store', 'history_store'):
+        monkeypatch.setattr(email_routes, name, None)
+
+    app = create_app('testing')
+    app.config['RESPONSE_DB_PATH'] = str(tmp_path / 'responses.db')
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def history_client(app, tmp_path):
+    """Fixture com o histórico habilitado em um banco temporário"""
+    app.config['HISTORY_ENABLED'] = True
+    app.config['HISTORY_DB_PATH'] = str(tmp_path / 'history.db')
+    yield app.test_client()
+    email_routes.history_store.close()
+
+
+def test_classify_text_returns_suggested_response(client):
+    """Testa o modo padrão: resposta gerada junto com a classificação"""
+    response = client.post('/api/classify', json={'text': 'Preciso de ajuda com um erro'})
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['category'] == 'Produtivo'
+    assert 'suggested_response' in data
+    assert 'response_id' not in data
+
+
+def test_lazy_classify_defers_response(client, monkeypatch):
+    """Testa o modo lazy: a resposta só é gerada ao buscar o handle"""
+    response = client.post('/api/classify', json={'text': 'Feliz Natal! Obrigado', 'lazy': True})
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['category'] == 'Improdutivo'
+    assert 'suggested_response' not in data
+
+    calls = []
+    generator = email_routes.response_generator
+    original = generator.generate_response
+    monkeypatch.setattr(generator, 'generate_response',
+                        lambda *args: calls.append(args) or original(*args))
+
+    first = client.get(data['response_url']).get_json()
+    second = client.get(data['response_url']).get_json()
+
+    assert first['suggested_response'] == second['suggested_response']
+    assert first['category'] == 'Improdutivo'
+    assert len(calls) == 1
+
+
+def test_unknown_response_id_returns_404(client):
+    """Testa busca de handle inexistente ou expirado"""
+    response = client.get('/api/responses/inexistente')
+
+    assert response.status_code == 404
+
+
+def _zip_bytes(members, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_zip_upload_returns_results_per_file(client):
+    """Testa envio de ZIP: membros .txt classificados, demais ignorados"""
+    archive = _zip_bytes({
+        'a.txt': 'Preciso de ajuda com um erro no sistema',
+        'pasta/b.txt': 'Feliz Natal! Obrigado por tudo',
+        'imagem.png': 'ignorado'
+    })
+    response = client.post('/api/classify', data={
+        'file': (io.BytesIO(archive), 'emails.zip')
+    }, content_type='multipart/form-data')
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['total'] == 2
+    assert [r['filename'] for r in data['results']] == ['emails.zip/a.txt', 'emails.zip/b.txt']
+    assert [r['category'] for r in data['results']] == ['Produtivo', 'Improdutivo']
+
+
+def test_multiple_files_upload(client):
+    """Testa envio de vários arquivos no mesmo campo"""
+    response = client.post('/api/classify', data={
+        'file': [
+            (io.BytesIO(b'Preciso de suporte urgente'), 'um.txt'),
+            (io.BytesIO(b''), 'vazio.txt')
+        ]
+    }, content_type='multipart/form-data')
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data['total'] == 2
+    assert data['errors'] == 1
+    assert data['results'][0]['category'] == 'Produtivo'
+    assert 'error' in data['results'][1]
+
+
+def test_zip_bomb_is_rejected(client):
+    """Testa rejeição de membros com taxa de compressão suspeita"""
+    archive = _zip_bytes({'bomba.txt': 'a' * (1024 * 1024)})
+    response = client.post('/api/classify', data={
+        'file': (io.BytesIO(archive), 'bomba.zip')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+
+
+def test_ndjson_stream_returns_one_line_per_record(client):
+    """Testa o endpoint NDJSON: um resultado por linha, erros isolados por registro"""
+    body = '\n'.join([
+        json.dumps({'id': 'a', 'text': 'Preciso de ajuda com um erro'}),
+        '',
+        'isto não é json',
+        json.dumps({'id': 'c', 'text': 'Feliz Natal! Obrigado'})
+    ]) + '\n'
+    response = client.post('/api/classify/stream', data=body,
+                           content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    by_index = {line['index']: line for line in lines}
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(lines) == 3
+    assert by_index[0]['id'] == 'a' and by_index[0]['category'] == 'Produtivo'
+    assert 'error' in by_index[1]
+    assert by_index[2]['id'] == 'c' and by_index[2]['category'] == 'Improdutivo'
+
+
+def test_ndjson_stream_accepts_body_larger_than_max_content_length(app, client):
+    """Testa que o streaming não aplica MAX_CONTENT_LENGTH ao corpo inteiro"""
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    line = json.dumps({'text': 'Preciso de ajuda com um erro'}) + '\n'
+    body = line * 200
+    assert len(body) > app.config['MAX_CONTENT_LENGTH']
+
+    response = client.post('/api/classify/stream?lazy=true', data=body,
+                           content_type='application/x-ndjson')
+    lines = [json.loads(item) for item in response.get_data(as_text=True).splitlines()]
+
+    assert response.status_code == 200
+    assert len(lines) == 200
+    assert all(item['category'] == 'Produtivo' and 'response_id' in item for item in lines)
+
+
+def test_history_records_and_paginates(history_client):
+    """Testa gravação no histórico, paginação por keyset e agregados"""
+    for text in ['Preciso de ajuda com um erro', 'Feliz Natal! Obrigado', 'Solicito suporte urgente']:
+        history_client.post('/api/classify', json={'text': text})
+    lazy = history_client.post('/api/classify', json={'text': 'Status do pedido?', 'lazy': True}).get_json()
+    history_client.get(lazy['response_url'])
+    email_routes.history_store.flush()
+
+    first = history_client.get('/api/history?limit=3').get_json()
+    second = history_client.get(f"/api/history?limit=3&cursor={first['next_cursor']}").get_json()
+
+    assert len(first['items']) == 3
+    assert first['items'][0]['response_id'] == lazy['response_id']
+    assert first['items'][0]['suggested_response']
+    assert len(second['items']) == 1 and second['next_cursor'] is None
+
+    improdutivos = history_client.get('/api/history?category=Improdutivo').get_json()
+    assert [item['category'] for item in improdutivos['items']] == ['Improdutivo']
+
+    stats = history_client.get('/api/history/stats?bucket=day').get_json()
+    assert stats['total'] == 4
+    assert stats['by_category']['Produtivo']['count'] == 3
+
+
+def test_history_disabled_returns_404(client):
+    """Testa que as rotas de histórico respondem 404 quando desabilitado"""
+    assert client.get('/api/history').status_code == 404
+
+
+def test_processors_are_created_once_under_concurrency(app, monkeypatch):
+    """Testa a inicialização lazy com várias threads (workers gthread)"""
+    created = []
+
+    class SlowClassifier:
+        def __init__(self):
+            created.append(self)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(email_routes, 'EmailClassifier', SlowClassifier)
+    results = []
+
+    def worker():
+        with app.app_context():
+            results.append(email_routes.get_processors())
+            results.append(email_routes.get_response_store())
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    processors = [result for result in results if isinstance(result, tuple)]
+    stores = [result for result in results if not isinstance(result, tuple)]
+    assert all(result == processors[0] for result in processors)
+    assert all(store is stores[0] for store in stores)
+
@@ -0,0 +1,141 @@
+"""
+Testes do watcher de Maildir/diretório de entrada
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.watcher.maildir_watcher import MaildirWatcher, inotify_simple
+
+PRODUCTIVE_EML = (
+    "From: cliente@example.com\n"
+    "Subject: Erro no sistema\n"
+    "Content-Type: text/plain; charset=utf-8\n"
+    "\n"
+    "Preciso de ajuda urgente com um problema no sistema.\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def local_classification(monkeypatch):
+    """Usa apenas a classificação local"""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+
+
+@pytest.fixture
+def maildir(tmp_path):
+    root = tmp_path / 'Maildir'
+    for name in ('new', 'cur', 'tmp'):
+        (root / name).mkdir(parents=True)
+    return root
+
+
+def _watcher(root, tmp_path, **kwargs):
+    kwargs.setdefault('jsonl_path', str(tmp_path / 'results.jsonl'))
+    return MaildirWatcher(str(root), state_path=str(tmp_path / 'state.db'),
+                          use_inotify=False, **kwargs)
+
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_maildir_only_new_messages_are_processed(maildir, tmp_path):
+    """Testa que mover a mensagem para cur/ ou reiniciar não reclassifica"""
+    (maildir / 'new' / '1700000000.M1P1.host').write_text(PRODUCTIVE_EML, encoding='utf-8')
+
+    watcher = _watcher(maildir, tmp_path)
+    records = watcher.run_once()
+    assert len(records) == 1
+    assert records[0]['category'] == 'Produtivo'
+    assert records[0]['suggested_response']
+
+    # O cliente de email move a mensagem e marca como lida
+    os.rename(maildir / 'new' / '1700000000.M1P1.host', maildir / 'cur' / '1700000000.M1P1.host:2,S')
+    assert watcher.run_once() == []
+    watcher.close()
+
+    # Reinício: o estado vem do SQLite
+    (maildir / 'new' / '1700000001.M2P1.host').write_text(
+        "Subject: Feliz Natal\n\nFeliz natal e obrigado!\n", encoding='utf-8'
+    )
+    watcher = _watcher(maildir, tmp_path)
+    records = watcher.run_once()
+    watcher.close()
+
+    assert [record['key'] for record in records] == ['1700000001.M2P1.host']
+    results = _read_jsonl(tmp_path / 'results.jsonl')
+    assert [result['category'] for result in results] == ['Produtivo', 'Improdutivo']
+
+
+def test_drop_directory_sidecar_and_overwrite(tmp_path):
+    """Testa sidecars, arquivos ignorados e reprocessamento de arquivo sobrescrito"""
+    inbox = tmp_path / 'entrada'
+    inbox.mkdir()
+    email_path = inbox / 'email.txt'
+    email_path.write_text('Preciso de ajuda com um erro no sistema', encoding='utf-8')
+    (inbox / 'notas.md').write_text('ignorado', encoding='utf-8')
+    (inbox / 'vazio.txt').write_text('', encoding='utf-8')
+
+    watcher = _watcher(inbox, tmp_path, output='sidecar', settle_seconds=0,
+                       generate_responses=False)
+    records = watcher.run_once()
+    assert sorted(os.path.basename(record['path']) for record in records) == ['email.txt', 'vazio.txt']
+    assert watcher.errors == 1
+
+    sidecar = json.loads((inbox / 'email.txt.classification.json').read_text(encoding='utf-8'))
+    assert sidecar['category'] == 'Produtivo'
+    assert 'suggested_response' not in sidecar
+    assert watcher.run_once() == []
+
+    # Arquivo sobrescrito (novo tamanho e data) é classificado de novo
+    email_path.write_text('Feliz natal e obrigado pela parceria!', encoding='utf-8')
+    os.utime(email_path, (time.time() - 5, time.time() - 5))
+    records = watcher.run_once()
+    watcher.close()
+    assert [record['category'] for record in records] == ['Improdutivo']
+
+
+def test_drop_directory_waits_for_recent_files(tmp_path):
+    """Testa que arquivos recém-modificados esperam a próxima varredura"""
+    inbox = tmp_path / 'entrada'
+    inbox.mkdir()
+    (inbox / 'email.txt').write_text('Preciso de ajuda com o sistema', encoding='utf-8')
+
+    watcher = _watcher(inbox, tmp_path, settle_seconds=60)
+    assert watcher.run_once() == []
+    watcher.close()
+
+
+@pytest.mark.parametrize('use_inotify', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(inotify_simple is None, reason='inotify_simple ausente'))
+])
+def test_run_processes_burst(maildir, tmp_path, use_inotify):
+    """Testa o loop de monitoramento com uma rajada de emails chegando via tmp/ -> new/"""
+    watcher = MaildirWatcher(str(maildir), state_path=str(tmp_path / 'state.db'),
+                             jsonl_path=str(tmp_path / 'results.jsonl'), poll_interval=0.05,
+                             debounce=0.05, use_inotify=use_inotify, generate_responses=False)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop_event,))
+    thread.start()
+    time.sleep(0.2)
+
+    for index in range(10):
+        temporary = maildir / 'tmp' / f'17000000{index:02d}.M{index}P1.host'
+        temporary.write_text(PRODUCTIVE_EML, encoding='utf-8')
+        os.rename(temporary, maildir / 'new' / temporary.name)
+
+    deadline = time.monotonic() + 5
+    while watcher.processed < 10 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stop_event.set()
+    thread.join()
+    watcher.close()
+
+    assert watcher.processed == 10
+    assert len(_read_jsonl(tmp_path / 'results.jsonl')) == 10
@@ -8,9 +8,16 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from backend.app import create_app
+from backend.routes.email_routes import get_processors
 
 # Create Flask application
 app = create_app()
 
+# Create shared processors when the worker boots, so concurrent first
+# requests (gthread/gevent) don't all wait on initialization
+if app.config.get('PRELOAD_PROCESSORS'):
+    with app.app_context():
+        get_processors()
+
 if __name__ == "__main__":
     app.run()